@@ -0,0 +1,78 @@
+"""
+Benchmark embedding model cold start and memory per inference backend.
+
+Each backend is measured in a fresh interpreter, so import and load costs
+are not shared: time to import sentence-transformers, load the model, run
+the first encode, plus the resident memory afterwards and the steady-state
+encode throughput.
+
+Usage:
+    PYTHONPATH=src python benchmarks/embedding_cold_start.py \
+        --backend torch onnx onnx:onnx/model_qint8_avx512_vnni.onnx
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+from zazu_bot.core.metrics import current_rss_bytes
+from zazu_bot.modules.memory.long_term.embeddings import load_embedding_model
+imported = time.perf_counter()
+model = load_embedding_model(sys.argv[1], sys.argv[2], sys.argv[3] or None)
+loaded = time.perf_counter()
+model.encode(["warmup"])
+warm = time.perf_counter()
+texts = ["Is planning a trip to Japan next spring"] * 256
+model.encode(texts, batch_size=32)
+steady = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_encode_s": warm - loaded,
+    "cold_start_s": warm - start,
+    "rss_mb": current_rss_bytes() / 2**20,
+    "texts_per_s": len(texts) / (steady - warm),
+}))
+"""
+
+
+def measure(model: str, backend: str) -> dict:
+    name, _, model_file = backend.partition(":")
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE, model, name, model_file],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> None:
+    columns = [
+        "import_s",
+        "load_s",
+        "first_encode_s",
+        "cold_start_s",
+        "rss_mb",
+        "texts_per_s",
+    ]
+    print(f"{'backend':>45} " + " ".join(f"{c:>14}" for c in columns))
+    for backend in args.backend:
+        result = measure(args.model, backend)
+        print(f"{backend:>45} " + " ".join(f"{result[c]:>14.2f}" for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument(
+        "--backend",
+        nargs="+",
+        default=["torch", "onnx", "onnx:onnx/model_qint8_avx512_vnni.onnx"],
+        help="Backends to compare, optionally with a model file as backend:file",
+    )
+    main(parser.parse_args())
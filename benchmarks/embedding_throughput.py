@@ -0,0 +1,73 @@
+"""
+Benchmark embedding throughput against concurrency.
+
+Compares one `encode` call per request (the previous behaviour) with the
+micro-batching EmbeddingService, for an increasing number of concurrent
+callers.
+
+Usage:
+    PYTHONPATH=src python benchmarks/embedding_throughput.py --requests 512
+"""
+
+import argparse
+import asyncio
+import time
+
+from sentence_transformers import SentenceTransformer
+
+from zazu_bot.core.executors import run_in_embedding_executor
+from zazu_bot.modules.memory.long_term.embeddings import EmbeddingService
+
+SAMPLE_TEXTS = [
+    "Works as a machine learning engineer in Madrid",
+    "Loves Star Wars and old science fiction movies",
+    "hey, how are you doing today?",
+    "I just got back from a run along the beach",
+    "Has a younger sister who studies medicine",
+    "Is planning a trip to Japan next spring",
+]
+
+
+async def run(embed, total: int, concurrency: int) -> float:
+    """Embed `total` texts with `concurrency` callers and return texts per second."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await embed(f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} #{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    model = SentenceTransformer(args.model)
+    model.encode("warmup")
+
+    service = EmbeddingService(
+        model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+
+    async def unbatched(text: str):
+        return await run_in_embedding_executor(model.encode, text)
+
+    print(f"{'concurrency':>12} {'unbatched/s':>14} {'batched/s':>14} {'speedup':>9}")
+    for concurrency in args.concurrency:
+        single = await run(unbatched, args.requests, concurrency)
+        batched = await run(service.embed, args.requests, concurrency)
+        print(
+            f"{concurrency:>12} {single:>14.1f} {batched:>14.1f} {batched / single:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64]
+    )
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
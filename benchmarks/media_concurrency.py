@@ -0,0 +1,145 @@
+"""
+Check that concurrent media calls overlap instead of queueing.
+
+Replaces the Groq, ElevenLabs and Together clients of the speech and image
+modules with fakes whose calls sleep for a fixed latency, fires N concurrent
+calls of each kind and asserts that they all complete in about one latency.
+Needs no API keys or network access.
+
+Usage:
+    PYTHONPATH=src python benchmarks/media_concurrency.py --calls 16 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import time
+import wave
+from types import SimpleNamespace
+
+for name in [
+    "GROQ_API_KEY",
+    "ELEVENLABS_API_KEY",
+    "ELEVENLABS_VOICE_ID",
+    "TOGETHER_API_KEY",
+]:
+    os.environ.setdefault(name, "benchmark")
+
+from zazu_bot.modules.image import ImageToText, TextToImage  # noqa: E402
+from zazu_bot.modules.speech import SpeechToText, TextToSpeech  # noqa: E402
+
+
+class FakeGroq:
+    """Async Groq client answering transcriptions and vision requests after a delay."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.audio = SimpleNamespace(
+            transcriptions=SimpleNamespace(create=self._transcribe)
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    async def _transcribe(self, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return "hello there"
+
+    async def _complete(self, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content="a cat on a sofa")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeElevenLabs:
+    """Async ElevenLabs client streaming a few audio chunks after a delay."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    async def generate(self, **kwargs):
+        await asyncio.sleep(self.latency)
+
+        async def chunks():
+            for _ in range(3):
+                yield b"\xff\xfb" + b"\x00" * 64
+
+        return chunks()
+
+
+class FakeTogether:
+    """Async Together client returning a tiny image after a delay."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.images = SimpleNamespace(generate=self._generate)
+
+    async def _generate(self, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[SimpleNamespace(b64_json="aW1hZ2U=")])
+
+
+def short_wav() -> bytes:
+    """One second of silence, short enough to be transcribed in one request."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16_000)
+        wav.writeframes(b"\x00" * 32_000)
+    return buffer.getvalue()
+
+
+async def timed(calls: int, make_call) -> float:
+    """Run `calls` concurrent calls and return the wall-clock time."""
+    start = time.perf_counter()
+    await asyncio.gather(*(make_call() for _ in range(calls)))
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    speech_to_text = SpeechToText()
+    speech_to_text._client = FakeGroq(args.latency)
+    text_to_speech = TextToSpeech()
+    text_to_speech._client = FakeElevenLabs(args.latency)
+    image_to_text = ImageToText()
+    image_to_text._client = FakeGroq(args.latency)
+    text_to_image = TextToImage()
+    text_to_image._together_client = FakeTogether(args.latency)
+
+    audio = short_wav()
+    benchmarks = {
+        "speech-to-text": lambda: speech_to_text.transcribe(audio),
+        "text-to-speech": lambda: text_to_speech.synthesize("Hello there."),
+        "image-to-text": lambda: image_to_text.analyze_image(b"image"),
+        "text-to-image": lambda: text_to_image.generate_image("a cat on a sofa"),
+    }
+
+    print(f"{'call':>16} {'calls':>6} {'latency s':>10} {'elapsed s':>10}")
+    failures = []
+    for name, make_call in benchmarks.items():
+        elapsed = await timed(args.calls, make_call)
+        print(f"{name:>16} {args.calls:>6} {args.latency:>10.2f} {elapsed:>10.2f}")
+        if elapsed > args.latency * args.tolerance:
+            failures.append(name)
+
+    assert not failures, (
+        f"Concurrent calls were serialized: {', '.join(failures)} took more than "
+        f"{args.tolerance}x the latency of one call"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--calls", type=int, default=16, help="Concurrent calls per kind"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Seconds per fake call"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Maximum elapsed time, as a multiple of the latency of one call",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""
+Benchmark Qdrant recall against search latency for different index settings.
+
+Loads the same vectors into one temporary collection per configuration
+(full precision vs int8 scalar quantization, with and without rescoring),
+then sweeps the search-time `ef` and reports recall@k against an exact
+numpy search together with p50/p95 latency. Temporary collections are
+dropped at the end.
+
+Usage:
+    PYTHONPATH=src python benchmarks/qdrant_recall_latency.py --points 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+
+from zazu_bot.settings import settings
+
+COLLECTION_PREFIX = "benchmark_recall"
+
+CONFIGS = {
+    "float32": {"quantized": False, "rescore": False},
+    "int8": {"quantized": True, "rescore": False},
+    "int8+rescore": {"quantized": True, "rescore": True},
+}
+
+
+def make_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    """Random unit vectors, clustered a little so neighbours are not all equidistant."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 100), dim))
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors += rng.normal(scale=0.5, size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def create_collection(
+    client: AsyncQdrantClient, name: str, vectors: np.ndarray, quantized: bool, args
+) -> None:
+    if await client.collection_exists(name):
+        await client.delete_collection(name)
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(
+            size=vectors.shape[1], distance=Distance.COSINE, on_disk=args.on_disk
+        ),
+        hnsw_config=HnswConfigDiff(m=args.m, ef_construct=args.ef_construct),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+        if quantized
+        else None,
+    )
+    for start in range(0, len(vectors), args.batch_size):
+        batch = vectors[start : start + args.batch_size]
+        await client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=start + i, vector=vector.tolist())
+                for i, vector in enumerate(batch)
+            ],
+        )
+
+    # Wait until the optimizer has built the index
+    while (await client.get_collection(name)).status != "green":
+        await asyncio.sleep(1)
+
+
+async def measure(
+    client: AsyncQdrantClient,
+    name: str,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    search_params: SearchParams,
+    k: int,
+) -> tuple[float, float, float]:
+    """Return recall@k, p50 and p95 latency in milliseconds."""
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = await client.search(
+            collection_name=name,
+            query_vector=query.tolist(),
+            search_params=search_params,
+            limit=k,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({point.id for point in results} & set(expected.tolist()))
+
+    latencies.sort()
+    return (
+        hits / (len(queries) * k),
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.95)],
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    client = AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+    vectors = make_vectors(args.points, args.dim, seed=0)
+    queries = make_vectors(args.queries, args.dim, seed=1)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+
+    print(f"{'config':>14} {'ef':>5} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    try:
+        for config_name, config in CONFIGS.items():
+            name = f"{COLLECTION_PREFIX}_{config_name.replace('+', '_')}"
+            await create_collection(client, name, vectors, config["quantized"], args)
+
+            for ef in args.ef:
+                quantization = None
+                if config["quantized"]:
+                    quantization = QuantizationSearchParams(
+                        rescore=config["rescore"], oversampling=args.oversampling
+                    )
+                recall, p50, p95 = await measure(
+                    client,
+                    name,
+                    queries,
+                    truth,
+                    SearchParams(hnsw_ef=ef, quantization=quantization),
+                    args.k,
+                )
+                print(
+                    f"{config_name:>14} {ef:>5} {recall:>8.3f} {p50:>8.2f} {p95:>8.2f}"
+                )
+    finally:
+        for config_name in CONFIGS:
+            name = f"{COLLECTION_PREFIX}_{config_name.replace('+', '_')}"
+            await client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construct", type=int, default=100)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--on-disk", action="store_true")
+    asyncio.run(main(parser.parse_args()))
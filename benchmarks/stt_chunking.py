@@ -0,0 +1,66 @@
+"""
+Benchmark transcription wall-clock time against voice note duration.
+
+For each audio file, compares a single Whisper request with chunked,
+concurrent transcription (split on silences, stitched with overlap dedup)
+and prints both latencies next to the audio duration. Needs pydub, ffmpeg
+and a GROQ_API_KEY.
+
+Usage:
+    PYTHONPATH=src python benchmarks/stt_chunking.py notes/*.ogg --repeat 3
+"""
+
+import argparse
+import asyncio
+import time
+
+from zazu_bot.modules.speech import SpeechToText
+from zazu_bot.modules.speech.audio_processing import load_audio, prepare_audio
+from zazu_bot.core.deadline import Deadline
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    speech_to_text = SpeechToText()
+    deadline = Deadline.unbounded()
+
+    print(
+        f"{'file':>30} {'audio s':>8} {'chunks':>7} {'single s':>9} {'chunked s':>10}"
+    )
+    for path in args.files:
+        with open(path, "rb") as f:
+            audio_data = f.read()
+        duration = len(load_audio(audio_data)) / 1000
+        _, chunks = prepare_audio(audio_data, preprocess=False)
+        chunks = chunks or [audio_data]
+
+        single = min(
+            [
+                await timed(speech_to_text._transcribe_bytes(audio_data, deadline))
+                for _ in range(args.repeat)
+            ]
+        )
+        chunked = min(
+            [
+                await timed(speech_to_text._transcribe_chunks(chunks, deadline))
+                for _ in range(args.repeat)
+            ]
+        )
+        print(
+            f"{path[-30:]:>30} {duration:>8.1f} {len(chunks):>7} "
+            f"{single:>9.2f} {chunked:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="+", help="Audio files to transcribe")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per mode, best is kept"
+    )
+    asyncio.run(main(parser.parse_args()))
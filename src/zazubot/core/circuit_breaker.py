@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+from zazu_bot.core.deadline import Deadline
+from zazu_bot.core.exceptions import CircuitOpenError, DeadlineExceededError
+from zazu_bot.core.metrics import metrics
+from zazu_bot.settings import settings
+
+# Names of the external providers protected by a circuit breaker
+TOGETHER = "together"
+ELEVENLABS = "elevenlabs"
+GROQ_VISION = "groq_vision"
+
+# Errors raised by our own code around a provider call, not by the provider
+NON_PROVIDER_ERRORS = (DeadlineExceededError, ValueError, TypeError, KeyError)
+
+
+class CircuitState(str, Enum):
+    """Possible states of a circuit breaker."""
+
+    CLOSED = "closed"  # Requests flow normally
+    OPEN = "open"  # Requests are rejected without calling the provider
+    HALF_OPEN = "half_open"  # A limited number of probe requests are let through
+
+
+# Numeric value exported for each state in the `circuit_breaker_state` gauge
+STATE_METRIC_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by every request that calls the same provider.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects calls immediately. Once `recovery_timeout` seconds have passed it
+    becomes half-open and lets a single probe through: a success closes it
+    again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        metrics.set_gauge(
+            "circuit_breaker_state",
+            STATE_METRIC_VALUES[self._state],
+            provider=self.name,
+        )
+
+    def _transition(self, state: CircuitState) -> None:
+        """Move to a new state. Must be called with the lock held."""
+        if state == self._state:
+            return
+        self.logger.warning(
+            f"Circuit breaker '{self.name}' changed from {self._state.value} to {state.value}"
+        )
+        self._state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state != CircuitState.HALF_OPEN:
+            self._half_open_calls = 0
+        self._publish_state()
+
+    def _refresh(self) -> None:
+        """Move an open breaker to half-open once the recovery timeout elapsed."""
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state of the breaker."""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def is_open(self) -> bool:
+        """Whether calls to the provider are currently being rejected."""
+        return self.state == CircuitState.OPEN
+
+    def has_capacity(self) -> bool:
+        """
+        Whether a call would currently be let through, without reserving a probe slot.
+
+        Unlike `is_open`, a half-open breaker whose probe is already in flight
+        counts as unavailable, so callers can route around it up front.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            return (
+                self._state == CircuitState.HALF_OPEN
+                and self._half_open_calls < self.half_open_max_calls
+            )
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go through and reserve a probe slot if half-open.
+
+        Returns:
+            True if the caller may contact the provider, False otherwise
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if (
+                self._state == CircuitState.HALF_OPEN
+                and self._half_open_calls < self.half_open_max_calls
+            ):
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful provider call."""
+        with self._lock:
+            self._failure_count = 0
+            self._transition(CircuitState.CLOSED)
+
+    def release_probe(self) -> None:
+        """Give back a probe slot whose call ended without a verdict, e.g. cancelled."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        """Record a failed provider call, opening the breaker if needed."""
+        metrics.increment("circuit_breaker_failures_total", provider=self.name)
+        with self._lock:
+            self._failure_count += 1
+            if (
+                self._state == CircuitState.HALF_OPEN
+                or self._failure_count >= self.failure_threshold
+            ):
+                self._transition(CircuitState.OPEN)
+
+    @contextmanager
+    def protect(self, deadline: Optional[Deadline] = None) -> Iterator[None]:
+        """
+        Guard a provider call with the breaker.
+
+        Only errors of the provider count as failures: local errors (see
+        `NON_PROVIDER_ERRORS`) and errors raised once the request's own
+        deadline has expired, typically a client timeout set from the
+        remaining budget, free the call without a verdict.
+
+        Args:
+            deadline: Deadline the call's timeout was derived from, if any
+
+        Raises:
+            CircuitOpenError: If the breaker is open and the call is rejected
+        """
+        if not self.allow_request():
+            metrics.increment("circuit_breaker_rejections_total", provider=self.name)
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+        try:
+            yield
+        except NON_PROVIDER_ERRORS:
+            self.release_probe()
+            raise
+        except Exception:
+            if deadline is not None and deadline.expired:
+                self.release_probe()
+            else:
+                self.record_failure()
+            raise
+        except BaseException:
+            # Cancellation says nothing about the provider, but the probe
+            # slot must be freed or a half-open breaker rejects calls forever
+            self.release_probe()
+            raise
+        else:
+            self.record_success()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Retrieve the circuit breaker for a provider, creating it on first use.
+
+    Args:
+        name: Provider name, e.g. `TOGETHER`, `ELEVENLABS` or `GROQ_VISION`
+
+    Returns:
+        The CircuitBreaker shared by every request for this provider
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
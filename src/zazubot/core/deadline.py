@@ -0,0 +1,77 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from zazu_bot.core.exceptions import DeadlineExceededError
+from zazu_bot.settings import settings
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """
+    End-to-end time budget for a single conversation turn.
+
+    The deadline is created once at ingress and stored as a Unix timestamp
+    under `configurable.deadline` in the RunnableConfig, so every node (and the
+    provider modules they call) can see how much of the budget is left.
+    """
+
+    expires_at: float  # Unix timestamp, `math.inf` for an unbounded deadline
+
+    @classmethod
+    def from_budget(
+        cls, seconds: float = settings.REQUEST_DEADLINE_SECONDS
+    ) -> "Deadline":
+        """Create a deadline `seconds` from now."""
+        return cls(time.time() + seconds)
+
+    @classmethod
+    def unbounded(cls) -> "Deadline":
+        """Create a deadline that never expires."""
+        return cls(math.inf)
+
+    @classmethod
+    def from_config(cls, config: Optional[RunnableConfig]) -> "Deadline":
+        """
+        Read the deadline carried in a RunnableConfig.
+
+        Returns an unbounded deadline when the caller did not set one.
+        """
+        expires_at = (config or {}).get("configurable", {}).get("deadline")
+        return cls(expires_at) if expires_at is not None else cls.unbounded()
+
+    @property
+    def is_bounded(self) -> bool:
+        return not math.isinf(self.expires_at)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.time())
+
+    def has_budget(self, seconds: float) -> bool:
+        """Whether at least `seconds` of the budget are left."""
+        return self.remaining() >= seconds
+
+    def timeout(self) -> Optional[float]:
+        """Remaining budget to use as a client timeout, or None if unbounded."""
+        return self.remaining() if self.is_bounded else None
+
+    def check(self, stage: str) -> None:
+        """
+        Fail fast before starting a stage once the budget is exhausted.
+
+        Args:
+            stage: Human readable name of the stage, used in the error message
+
+        Raises:
+            DeadlineExceededError: If the deadline has already passed
+        """
+        if self.expired:
+            raise DeadlineExceededError(f"Deadline exceeded before {stage}")
@@ -20,3 +20,15 @@ class ImageToTextError(Exception):
     """Custom exception for Image-to-text conversion errors."""
 
     pass
+
+
+class CircuitOpenError(Exception):
+    """Custom exception raised when a provider's circuit breaker is open."""
+
+    pass
+
+
+class DeadlineExceededError(Exception):
+    """Custom exception raised when a request runs out of its time budget."""
+
+    pass
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable
+
+from zazu_bot.settings import settings
+
+
+@lru_cache(maxsize=1)
+def get_media_executor() -> ThreadPoolExecutor:
+    """
+    Bounded thread pool for blocking media work such as audio decoding.
+
+    Provider calls go through their async clients; only CPU or file bound
+    media processing runs here, on at most `MEDIA_THREAD_POOL_SIZE` threads.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.MEDIA_THREAD_POOL_SIZE, thread_name_prefix="media"
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """
+    Dedicated thread pool for CPU-bound embedding computation.
+
+    Kept separate from the media pool so slow providers cannot starve memory
+    retrieval, and small so encoding does not compete with the event loop.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.EMBEDDING_THREAD_POOL_SIZE,
+        thread_name_prefix="embedding",
+    )
+
+
+@lru_cache(maxsize=1)
+def get_storage_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool for blocking local file I/O such as vector store flushes.
+
+    Kept apart from the media and embedding pools so large writes neither
+    wait behind slow providers nor delay memory retrieval.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.STORAGE_THREAD_POOL_SIZE, thread_name_prefix="storage"
+    )
+
+
+async def run_in_storage_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run blocking file I/O on the storage thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_storage_executor(), partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_embedding_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run an embedding computation on its dedicated thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_embedding_executor(), partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_media_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking function on the media thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_media_executor(), partial(func, *args, **kwargs)
+    )
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import resource
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process registry for counters, gauges and timing observations.
+
+    Metrics are keyed by name plus an optional set of labels and can be
+    exported as a plain dictionary, e.g. from the `/metrics` endpoint.
+    """
+
+    # Number of recent observations kept per series to compute percentiles
+    OBSERVATION_WINDOW = 1000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.OBSERVATION_WINDOW)
+        )
+        self._observation_totals: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, object]) -> str:
+        """Build a Prometheus-style series key such as `name{label="value"}`."""
+        if not labels:
+            return name
+        label_str = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+        return f"{name}{{{label_str}}}"
+
+    def increment(self, name: str, value: float = 1.0, **labels) -> None:
+        """Increase a counter by the given value."""
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to the given value."""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a single observation, typically a duration in seconds."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._observations[key].append(value)
+            totals = self._observation_totals[key]
+            totals[0] += 1
+            totals[1] += value
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0.0)
+
+    def get_gauge(self, name: str, **labels) -> Optional[float]:
+        """Return the current value of a gauge, or None if never set."""
+        with self._lock:
+            return self._gauges.get(self._key(name, labels))
+
+    @staticmethod
+    def _percentile(values: list, percentile: float) -> float:
+        index = min(len(values) - 1, int(round(percentile * (len(values) - 1))))
+        return values[index]
+
+    def snapshot(self) -> dict:
+        """
+        Export every metric as a dictionary.
+
+        Observations are summarised with their total count and sum, plus
+        p50/p95/max computed over the most recent window.
+        """
+        with self._lock:
+            observations = {}
+            for key, window in self._observations.items():
+                values = sorted(window)
+                count, total = self._observation_totals[key]
+                observations[key] = {
+                    "count": count,
+                    "sum": total,
+                    "p50": self._percentile(values, 0.5),
+                    "p95": self._percentile(values, 0.95),
+                    "max": values[-1],
+                }
+
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "observations": observations,
+            }
+
+
+# Create a singleton metrics registry
+metrics = MetricsRegistry()
+
+
+def current_rss_bytes() -> int:
+    """
+    Resident set size of the current process in bytes.
+
+    Read from /proc on Linux; elsewhere falls back to the peak RSS.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Periodically measure how late the event loop wakes up.
+
+    Any blocking call on the loop shows up as lag in the
+    `event_loop_lag_seconds` observations. Runs until cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        metrics.observe("event_loop_lag_seconds", max(0.0, lag))
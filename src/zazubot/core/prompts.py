@@ -166,3 +166,66 @@ Output: {{
 Message: {message}
 Output:
 """
+
+MEMORY_BATCH_ANALYSIS_PROMPT = """Extract and format important personal facts about the users from their messages.
+Each message comes from a possibly different user and must be analyzed on its own.
+Focus on the actual information, not meta-commentary or requests.
+
+Important facts include:
+- Personal details (name, age, location)
+- Professional info (job, education, skills)
+- Preferences (likes, dislikes, favorites)
+- Life circumstances (family, relationships)
+- Significant experiences or achievements
+- Personal goals or aspirations
+
+Rules:
+1. Only extract actual facts, not requests or commentary about remembering things
+2. Convert facts into clear, third-person statements
+3. If no actual facts are present, mark as not important
+4. Remove conversational elements and focus on the core information
+5. Return exactly one result per message, with the same id as the message
+
+Example:
+Messages:
+[{{"id": "0", "message": "Please make a note that I work as an engineer"}},
+ {{"id": "1", "message": "Hey, how are you today?"}}]
+Output: {{
+    "results": [
+        {{"id": "0", "is_important": true, "formatted_memory": "Works as an engineer"}},
+        {{"id": "1", "is_important": false, "formatted_memory": null}}
+    ]
+}}
+
+Messages:
+{messages}
+Output:
+"""
+
+MEMORY_MERGE_PROMPT = """Merge these facts about the same user into a single fact.
+The facts are listed oldest first, each with the date it was recorded.
+
+Rules:
+1. Keep every distinct piece of information that is still true
+2. When facts contradict each other, keep the most recent one
+3. Write one clear, third-person statement without dates or commentary
+
+Examples:
+Facts:
+- (2024-01-10) Works as an engineer
+- (2024-06-02) Works as a software engineer at a startup
+Output: {{
+    "formatted_memory": "Works as a software engineer at a startup"
+}}
+
+Facts:
+- (2023-11-05) Lives in Madrid
+- (2024-09-20) Moved to Barcelona
+Output: {{
+    "formatted_memory": "Lives in Barcelona"
+}}
+
+Facts:
+{facts}
+Output:
+"""
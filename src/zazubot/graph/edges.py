@@ -1,15 +1,22 @@
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.graph.state import AICompanionState
 from zazu_bot.settings import settings
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END
 from typing_extensions import Literal
 
 
 def should_summarize_conversation(
     state: AICompanionState,
+    config: RunnableConfig,
 ) -> Literal["summarize_conversation_node", "__end__"]:
     messages = state["messages"]
 
+    # The summary is deferred to a later turn when the budget is running low
+    if not Deadline.from_config(config).has_budget(settings.DEADLINE_LOW_BUDGET):
+        return END
+
     if len(messages) > settings.TOTAL_MESSAGES_SUMMARY_TRIGGER:
         return "summarize_conversation_node"
 
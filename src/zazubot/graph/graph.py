@@ -9,9 +9,12 @@ from zazu_bot.graph.edges import (
 from zazu_bot.graph.nodes import (
     audio_node,
     conversation_node,
+    image_caption_node,
+    image_generation_node,
     image_node,
     router_node,
     summarize_conversation_node,
+    text_to_speech_node,
     context_injection_node,
     memory_extraction_node,
     memory_injection_node,
@@ -31,6 +34,9 @@ def create_workflow_graph():
     graph_builder.add_node("conversation_node", conversation_node)
     graph_builder.add_node("image_node", image_node)
     graph_builder.add_node("audio_node", audio_node)
+    graph_builder.add_node("image_caption_node", image_caption_node)
+    graph_builder.add_node("image_generation_node", image_generation_node)
+    graph_builder.add_node("text_to_speech_node", text_to_speech_node)
     graph_builder.add_node("summarize_conversation_node", summarize_conversation_node)
 
     # Define the flow
@@ -47,12 +53,25 @@ def create_workflow_graph():
     # Then proceed to appropriate response node
     graph_builder.add_conditional_edges("memory_injection_node", select_workflow)
 
+    # Once the scenario exists, the caption and the image are generated in parallel
+    graph_builder.add_edge("image_node", "image_caption_node")
+    graph_builder.add_edge("image_node", "image_generation_node")
+
+    # Wait for the audio only once the text reply is out, so it can be sent first
+    graph_builder.add_edge("audio_node", "text_to_speech_node")
+
     # Check for summarization after any response
     graph_builder.add_conditional_edges(
         "conversation_node", should_summarize_conversation
     )
-    graph_builder.add_conditional_edges("image_node", should_summarize_conversation)
-    graph_builder.add_conditional_edges("audio_node", should_summarize_conversation)
+    # Both image branches finish in the same step, only one of them needs the check
+    graph_builder.add_conditional_edges(
+        "image_caption_node", should_summarize_conversation
+    )
+    graph_builder.add_edge("image_generation_node", END)
+    graph_builder.add_conditional_edges(
+        "text_to_speech_node", should_summarize_conversation
+    )
     graph_builder.add_edge("summarize_conversation_node", END)
 
     return graph_builder
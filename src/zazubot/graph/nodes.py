@@ -1,30 +1,47 @@
+import logging
 import os
 from uuid import uuid4
 
 from langchain_core.messages import HumanMessage, RemoveMessage, AIMessage
 from langchain_core.runnables import RunnableConfig
 
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.graph.utils.chains import (
     get_character_response_chain,
     get_router_chain,
 )
 from zazu_bot.graph.utils.helpers import (
+    get_available_workflow,
     get_chat_model,
+    get_model_name_for_budget,
     get_text_to_speech_module,
     get_text_to_image_module,
+    get_thread_id,
+    should_synthesize_speech,
 )
 from zazu_bot.graph.state import AICompanionState
 from zazu_bot.modules.schedules.context_generation import ScheduleContextGenerator
 from zazu_bot.settings import settings
-from zazu_bot.modules.memory.long_term.memory_manager import get_memory_manager
+from zazu_bot.modules.memory.long_term.memory_manager import (
+    extract_memories_in_background,
+    get_memory_manager,
+)
+
+logger = logging.getLogger(__name__)
+
 
+async def router_node(state: AICompanionState, config: RunnableConfig):
+    deadline = Deadline.from_config(config)
 
-async def router_node(state: AICompanionState):
-    chain = get_router_chain()
+    # Not enough budget left for anything but a text reply, skip routing
+    if not deadline.has_budget(settings.DEADLINE_LOW_BUDGET):
+        return {"workflow": "conversation"}
+
+    chain = get_router_chain(timeout=deadline.timeout())
     response = await chain.ainvoke(
         {"messages": state["messages"][-settings.ROUTER_MESSAGES_TO_ANALYZE :]}
     )
-    return {"workflow": response.response_type}
+    return {"workflow": get_available_workflow(response.response_type, deadline)}
 
 
 def context_injection_node(state: AICompanionState):
@@ -37,10 +54,15 @@ def context_injection_node(state: AICompanionState):
 
 
 async def conversation_node(state: AICompanionState, config: RunnableConfig):
+    deadline = Deadline.from_config(config)
     current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
-    chain = get_character_response_chain(state.get("summary", ""))
+    chain = get_character_response_chain(
+        state.get("summary", ""),
+        model_name=get_model_name_for_budget(deadline),
+        timeout=deadline.timeout(),
+    )
 
     response = await chain.ainvoke(
         {
@@ -54,20 +76,32 @@ async def conversation_node(state: AICompanionState, config: RunnableConfig):
 
 
 async def image_node(state: AICompanionState, config: RunnableConfig):
+    """Create the scenario both the caption and the image are generated from."""
+    deadline = Deadline.from_config(config)
+    text_to_image_module = get_text_to_image_module()
+
+    scenario = await text_to_image_module.create_scenario(
+        state["messages"][-5:], deadline=deadline
+    )
+
+    return {"image_prompt": scenario.image_prompt}
+
+
+async def image_caption_node(state: AICompanionState, config: RunnableConfig):
+    """Write the caption from the image prompt, concurrently with the image generation."""
+    deadline = Deadline.from_config(config)
     current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
-    chain = get_character_response_chain(state.get("summary", ""))
-    text_to_image_module = get_text_to_image_module()
-
-    scenario = await text_to_image_module.create_scenario(state["messages"][-5:])
-    os.makedirs("generated_images", exist_ok=True)
-    img_path = f"generated_images/image_{str(uuid4())}.png"
-    await text_to_image_module.generate_image(scenario.image_prompt, img_path)
+    chain = get_character_response_chain(
+        state.get("summary", ""),
+        model_name=get_model_name_for_budget(deadline),
+        timeout=deadline.timeout(),
+    )
 
     # Inject the image prompt information as an AI message
     scenario_message = HumanMessage(
-        content=f"<image attached by Zazu generated from prompt: {scenario.image_prompt}>"
+        content=f"<image attached by Zazu generated from prompt: {state['image_prompt']}>"
     )
     updated_messages = state["messages"] + [scenario_message]
 
@@ -80,15 +114,44 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
         config,
     )
 
-    return {"messages": AIMessage(content=response), "image_path": img_path}
+    return {"messages": AIMessage(content=response)}
+
+
+async def image_generation_node(state: AICompanionState, config: RunnableConfig):
+    """Generate the image from the image prompt, concurrently with the caption."""
+    deadline = Deadline.from_config(config)
+    text_to_image_module = get_text_to_image_module()
+
+    os.makedirs("generated_images", exist_ok=True)
+    img_path = f"generated_images/image_{str(uuid4())}.png"
+    try:
+        await text_to_image_module.generate_image(
+            state["image_prompt"], img_path, deadline=deadline
+        )
+    except Exception as e:
+        # The caption is delivered on its own, the turn survives without the image
+        logger.warning(f"Image generation failed: {e}")
+        return {"image_path": ""}
+
+    return {"image_path": img_path}
 
 
 async def audio_node(state: AICompanionState, config: RunnableConfig):
+    """Generate the reply of the audio workflow, spoken by `text_to_speech_node`.
+
+    Interfaces that stream the graph can speak the reply sentence by sentence
+    while this node writes it (see `SpokenReply`) and opt out of the
+    synthesis in `text_to_speech_node`.
+    """
+    deadline = Deadline.from_config(config)
     current_activity = ScheduleContextGenerator.get_current_activity()
     memory_context = state.get("memory_context", "")
 
-    chain = get_character_response_chain(state.get("summary", ""))
-    text_to_speech_module = get_text_to_speech_module()
+    chain = get_character_response_chain(
+        state.get("summary", ""),
+        model_name=get_model_name_for_budget(deadline),
+        timeout=deadline.timeout(),
+    )
 
     response = await chain.ainvoke(
         {
@@ -98,13 +161,35 @@ async def audio_node(state: AICompanionState, config: RunnableConfig):
         },
         config,
     )
-    output_audio = await text_to_speech_module.synthesize(response)
 
-    return {"messages": response, "audio_buffer": output_audio}
+    return {"messages": AIMessage(content=response)}
+
+
+async def text_to_speech_node(state: AICompanionState, config: RunnableConfig):
+    """Synthesize the reply after it was generated, so the text can be delivered first."""
+    if not should_synthesize_speech(config):
+        return {"audio_buffer": b""}
+
+    deadline = Deadline.from_config(config)
+    text_to_speech_module = get_text_to_speech_module()
+
+    try:
+        output_audio = await text_to_speech_module.synthesize(
+            state["messages"][-1].content, deadline=deadline
+        )
+    except Exception as e:
+        # The text reply has already been sent, the turn survives without audio
+        logger.warning(f"Speech synthesis failed: {e}")
+        return {"audio_buffer": b""}
+
+    return {"audio_buffer": output_audio}
 
 
-async def summarize_conversation_node(state: AICompanionState):
-    model = get_chat_model()
+async def summarize_conversation_node(state: AICompanionState, config: RunnableConfig):
+    deadline = Deadline.from_config(config)
+    model = get_chat_model(
+        model_name=get_model_name_for_budget(deadline), timeout=deadline.timeout()
+    )
     summary = state.get("summary", "")
 
     if summary:
@@ -129,23 +214,41 @@ async def summarize_conversation_node(state: AICompanionState):
     return {"summary": response.content, "messages": delete_messages}
 
 
-async def memory_extraction_node(state: AICompanionState):
+async def memory_extraction_node(state: AICompanionState, config: RunnableConfig):
     """Extract and store important information from the last message."""
     if not state["messages"]:
         return {}
 
+    # Extraction is off the critical path, the turn does not wait for it
+    if settings.MEMORY_EXTRACTION_IN_BACKGROUND:
+        extract_memories_in_background(state["messages"][-1], get_thread_id(config))
+        return {}
+
+    # Memory extraction is optional, drop it when the budget is running low
+    if not Deadline.from_config(config).has_budget(settings.DEADLINE_LOW_BUDGET):
+        return {}
+
     memory_manager = get_memory_manager()
-    await memory_manager.extract_and_store_memories(state["messages"][-1])
+    await memory_manager.extract_and_store_memories(
+        state["messages"][-1], get_thread_id(config)
+    )
     return {}
 
 
-def memory_injection_node(state: AICompanionState):
+async def memory_injection_node(state: AICompanionState, config: RunnableConfig):
     """Retrieve and inject relevant memories into the character card."""
+    # Answer without memories rather than miss the deadline, and clear those
+    # of the previous turn so they are not mistaken for this turn's
+    if Deadline.from_config(config).expired:
+        return {"memory_context": ""}
+
     memory_manager = get_memory_manager()
 
     # Get relevant memories based on recent conversation
     recent_context = " ".join([m.content for m in state["messages"][-3:]])
-    memories = memory_manager.get_relevant_memories(recent_context)
+    memories = await memory_manager.get_relevant_memories(
+        recent_context, get_thread_id(config)
+    )
 
     # Format memories for the character card
     memory_context = memory_manager.format_memories_for_prompt(memories)
@@ -11,12 +11,15 @@ class AICompanionState(MessagesState):
             LangChain message type (HumanMessage, AIMessage, etc.)
         workflow (str): The current workflow the AI Companion is in. Can be "conversation", "image", or "audio".
         audio_buffer (bytes): The audio buffer to be used for speech-to-text conversion.
+        image_prompt (str): The visual prompt of the image scenario, used to generate the image.
+        image_path (str): The path of the generated image, empty if generation failed.
         current_activity (str): The current activity of Zazu based on the schedule.
     """
 
     summary: str
     workflow: str
     audio_buffer: bytes
+    image_prompt: str
     image_path: str
     current_activity: str
     apply_activity: bool
@@ -1,8 +1,11 @@
+from typing import Optional
+
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from pydantic import BaseModel, Field
 
 from zazu_bot.core.prompts import CHARACTER_CARD_PROMPT, ROUTER_PROMPT
 from zazu_bot.graph.utils.helpers import AsteriskRemovalParser, get_chat_model
+from zazu_bot.settings import settings
 
 
 class RouterResponse(BaseModel):
@@ -11,8 +14,10 @@ class RouterResponse(BaseModel):
     )
 
 
-def get_router_chain():
-    model = get_chat_model(temperature=0.3).with_structured_output(RouterResponse)
+def get_router_chain(timeout: Optional[float] = None):
+    model = get_chat_model(temperature=0.3, timeout=timeout).with_structured_output(
+        RouterResponse
+    )
 
     prompt = ChatPromptTemplate.from_messages(
         [("system", ROUTER_PROMPT), MessagesPlaceholder(variable_name="messages")]
@@ -21,8 +26,12 @@ def get_router_chain():
     return prompt | model
 
 
-def get_character_response_chain(summary: str = ""):
-    model = get_chat_model()
+def get_character_response_chain(
+    summary: str = "",
+    model_name: str = settings.TEXT_MODEL_NAME,
+    timeout: Optional[float] = None,
+):
+    model = get_chat_model(model_name=model_name, timeout=timeout)
     system_message = CHARACTER_CARD_PROMPT
 
     if summary:
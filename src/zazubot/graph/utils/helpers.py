@@ -1,22 +1,50 @@
 import re
+from typing import AsyncIterator, Iterator, Optional, Union
 
+from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from langchain_groq import ChatGroq
 
+from zazu_bot.core.circuit_breaker import ELEVENLABS, TOGETHER, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.modules.speech import TextToSpeech
+from zazu_bot.modules.speech.sentences import SENTENCE_END
 from zazu_bot.settings import settings
 from zazu_bot.modules.image.text_to_image import TextToImage
 from zazu_bot.modules.image.image_to_text import ImageToText
 
 
-def get_chat_model(temperature: float = 0.7):
+def get_chat_model(
+    temperature: float = 0.7,
+    model_name: str = settings.TEXT_MODEL_NAME,
+    timeout: Optional[float] = None,
+):
     return ChatGroq(
         api_key=settings.GROQ_API_KEY,
-        model_name=settings.TEXT_MODEL_NAME,
+        model_name=model_name,
         temperature=temperature,
+        timeout=timeout,
     )
 
 
+def get_model_name_for_budget(deadline: Deadline) -> str:
+    """Switch to the smaller text model when the request budget runs low."""
+    if deadline.has_budget(settings.DEADLINE_LOW_BUDGET):
+        return settings.TEXT_MODEL_NAME
+    return settings.SMALL_TEXT_MODEL_NAME
+
+
+def get_thread_id(config: RunnableConfig) -> str:
+    """Conversation thread id of the current run, used to partition memories per user."""
+    return str(config["configurable"]["thread_id"])
+
+
+def should_synthesize_speech(config: RunnableConfig) -> bool:
+    """Whether the audio workflow speaks its reply, callers speaking it themselves opt out."""
+    return config["configurable"].get("synthesize_speech", True)
+
+
 def get_text_to_speech_module():
     return TextToSpeech()
 
@@ -29,11 +57,111 @@ def get_image_to_text_module():
     return ImageToText()
 
 
+# Provider each media workflow depends on
+WORKFLOW_PROVIDERS = {
+    "image": TOGETHER,
+    "audio": ELEVENLABS,
+}
+
+# Minimum remaining budget (seconds) each media workflow needs
+WORKFLOW_MIN_BUDGETS = {
+    "image": settings.DEADLINE_IMAGE_MIN_BUDGET,
+    "audio": settings.DEADLINE_AUDIO_MIN_BUDGET,
+}
+
+
+def get_available_workflow(workflow: str, deadline: Optional[Deadline] = None) -> str:
+    """Degrade a media workflow to a text reply when its provider's circuit is
+    open or when the request does not have enough budget left for it."""
+    provider = WORKFLOW_PROVIDERS.get(workflow)
+    if provider and not get_circuit_breaker(provider).has_capacity():
+        return "conversation"
+
+    min_budget = WORKFLOW_MIN_BUDGETS.get(workflow)
+    if deadline and min_budget and not deadline.has_budget(min_budget):
+        return "conversation"
+
+    return workflow
+
+
+# Content between asterisks, e.g. *smiles*. Pairs never span lines.
+ASTERISK_CONTENT = re.compile(r"\*.*?\*")
+
+
 def remove_asterisk_content(text: str) -> str:
     """Remove content between asterisks from the text."""
-    return re.sub(r"\*.*?\*", "", text).strip()
+    return ASTERISK_CONTENT.sub("", text).strip()
+
+
+class StreamedSentenceSplitter:
+    """
+    Turn streamed text into complete sentences with the asterisk content removed.
+
+    Text is released up to the last sentence end seen so far. An asterisk that
+    is not closed yet holds back the rest of its line, since the content it
+    opens must not be released before it is removed. Joined and stripped, the
+    released pieces equal `remove_asterisk_content` of the whole text.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._started = False
+
+    def _release(self, end: int) -> str:
+        piece, self._pending = self._pending[:end], self._pending[end:]
+        if not self._started:
+            piece = piece.lstrip()
+            self._started = bool(piece)
+        return piece
+
+    def feed(self, text: str) -> str:
+        """Add streamed text and return the sentences it completed, possibly empty."""
+        self._pending = ASTERISK_CONTENT.sub("", self._pending + text)
+
+        # After removing the pairs, at most one asterisk remains open on the last line
+        open_at = self._pending.find("*", self._pending.rfind("\n") + 1)
+        releasable = self._pending if open_at < 0 else self._pending[:open_at]
+
+        end = 0
+        for match in SENTENCE_END.finditer(releasable):
+            end = match.end()
+        return self._release(end)
+
+    def flush(self) -> str:
+        """Return whatever is left once the stream is over."""
+        return self._release(len(self._pending)).rstrip()
 
 
 class AsteriskRemovalParser(StrOutputParser):
+    """
+    String parser removing the content between asterisks.
+
+    When streamed it yields complete sentences instead of tokens: stripping
+    cannot be done on tokens, and sentences are what speech synthesis of a
+    reply that is still being generated needs.
+    """
+
     def parse(self, text):
         return remove_asterisk_content(super().parse(text))
+
+    @staticmethod
+    def _chunk_text(chunk: Union[str, BaseMessage]) -> str:
+        return chunk.content if isinstance(chunk, BaseMessage) else chunk
+
+    def _transform(self, input: Iterator[Union[str, BaseMessage]]) -> Iterator[str]:
+        splitter = StreamedSentenceSplitter()
+        for chunk in input:
+            if sentences := splitter.feed(self._chunk_text(chunk)):
+                yield sentences
+        if rest := splitter.flush():
+            yield rest
+
+    async def _atransform(
+        self, input: AsyncIterator[Union[str, BaseMessage]]
+    ) -> AsyncIterator[str]:
+        splitter = StreamedSentenceSplitter()
+        async for chunk in input:
+            if sentences := splitter.feed(self._chunk_text(chunk)):
+                yield sentences
+        if rest := splitter.flush():
+            yield rest
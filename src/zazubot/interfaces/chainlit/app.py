@@ -1,12 +1,24 @@
+import asyncio
+import time
 from io import BytesIO
+from typing import Set
 
 import chainlit as cl
 from langchain_core.messages import AIMessageChunk, HumanMessage
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
+from zazu_bot.core.circuit_breaker import GROQ_VISION, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.graph import graph_builder
+from zazu_bot.graph.utils.helpers import StreamedSentenceSplitter
 from zazu_bot.modules.image import ImageToText
-from zazu_bot.modules.speech import SpeechToText, TextToSpeech
+from zazu_bot.modules.memory.long_term.memory_manager import (
+    close_long_term_memory,
+    warm_up_long_term_memory,
+)
+from zazu_bot.modules.speech import SpeechToText, SpokenReply, TextToSpeech
+from zazu_bot.modules.speech.audio_processing import detect_audio_format
+from zazu_bot.modules.speech.transcription_cache import get_transcription_cache
 
 from zazu_bot.settings import settings
 
@@ -15,6 +27,38 @@ speech_to_text = SpeechToText()
 text_to_speech = TextToSpeech()
 image_to_text = ImageToText()
 
+# Graph nodes whose model output is the reply shown to the user
+RESPONSE_NODES = {"conversation_node", "image_caption_node", "audio_node"}
+
+# Playback rate of the synthesized audio, 128 kbps MP3 (the ElevenLabs default)
+TTS_BYTES_PER_SECOND = 128_000 / 8
+
+
+# Startup tasks, referenced so they are not garbage collected
+_startup_tasks: Set[asyncio.Task] = set()
+
+
+async def _warm_up() -> None:
+    try:
+        await warm_up_long_term_memory()
+    except Exception as e:
+        cl.logger.error(f"Failed to warm up long-term memory: {e}")
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    """Warm up long-term memory in the background so the first turn does not pay for it."""
+    task = asyncio.create_task(_warm_up())
+    _startup_tasks.add(task)
+    task.add_done_callback(_startup_tasks.discard)
+
+
+@cl.on_app_shutdown
+async def on_app_shutdown():
+    """Flush queued memory writes and close the caches before the process exits."""
+    await close_long_term_memory()
+    await get_transcription_cache().close()
+
 
 @cl.on_chat_start
 async def on_chat_start():
@@ -26,6 +70,7 @@ async def on_chat_start():
 @cl.on_message
 async def on_message(message: cl.Message):
     """Handle text messages and images"""
+    deadline = Deadline.from_budget()
     msg = cl.Message(content="")
 
     # Process any attached images
@@ -33,6 +78,11 @@ async def on_message(message: cl.Message):
     if message.elements:
         for elem in message.elements:
             if isinstance(elem, cl.Image):
+                # Skip the analysis altogether while the vision model is failing
+                if not get_circuit_breaker(GROQ_VISION).has_capacity():
+                    cl.logger.warning("Vision circuit is open, skipping image analysis")
+                    continue
+
                 # Read image file content
                 with open(elem.path, "rb") as f:
                     image_bytes = f.read()
@@ -43,6 +93,7 @@ async def on_message(message: cl.Message):
                     description = await image_to_text.analyze_image(
                         image_bytes,
                         "Please describe what you see in this image in the context of our conversation.",
+                        deadline=deadline,
                     )
                     content += f"\n[Image Analysis: {description}]"
                 except Exception as e:
@@ -58,7 +109,12 @@ async def on_message(message: cl.Message):
             graph = graph_builder.compile(checkpointer=short_term_memory)
             async for chunk in graph.astream(
                 {"messages": [HumanMessage(content=content)]},
-                {"configurable": {"thread_id": thread_id}},
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "deadline": deadline.expires_at,
+                    }
+                },
                 stream_mode="messages",
             ):
                 if chunk[1]["langgraph_node"] == "conversation_node" and isinstance(
@@ -72,18 +128,23 @@ async def on_message(message: cl.Message):
 
     if output_state.values.get("workflow") == "audio":
         response = output_state.values["messages"][-1].content
-        audio_buffer = output_state.values["audio_buffer"]
-        output_audio_el = cl.Audio(
-            name="Audio",
-            auto_play=True,
-            mime="audio/mpeg3",
-            content=audio_buffer,
-        )
-        await cl.Message(content=response, elements=[output_audio_el]).send()
+        audio_buffer = output_state.values.get("audio_buffer")
+        elements = []
+        if audio_buffer:
+            elements.append(
+                cl.Audio(
+                    name="Audio",
+                    auto_play=True,
+                    mime="audio/mpeg3",
+                    content=audio_buffer,
+                )
+            )
+        await cl.Message(content=response, elements=elements).send()
     elif output_state.values.get("workflow") == "image":
         response = output_state.values["messages"][-1].content
-        image = cl.Image(path=output_state.values["image_path"], display="inline")
-        await cl.Message(content=response, elements=[image]).send()
+        image_path = output_state.values.get("image_path")
+        elements = [cl.Image(path=image_path, display="inline")] if image_path else []
+        await cl.Message(content=response, elements=elements).send()
     else:
         await msg.send()
 
@@ -102,40 +163,95 @@ async def on_audio_chunk(chunk: cl.AudioChunk):
 @cl.on_audio_end
 async def on_audio_end(elements):
     """Process completed audio input"""
+    deadline = Deadline.from_budget()
+
     # Get audio data
     audio_buffer = cl.user_session.get("audio_buffer")
     audio_buffer.seek(0)
     audio_data = audio_buffer.read()
 
     # Show user's audio message
-    input_audio_el = cl.Audio(mime="audio/mpeg3", content=audio_data)
+    _, input_mime_type = detect_audio_format(audio_data)
+    input_audio_el = cl.Audio(mime=input_mime_type, content=audio_data)
     await cl.Message(
         author="You", content="", elements=[input_audio_el, *elements]
     ).send()
 
-    # Use global SpeechToText instance
-    transcription = await speech_to_text.transcribe(audio_data)
+    # Reuse the transcript of audio seen before, otherwise transcribe it
+    transcription_cache = get_transcription_cache()
+    transcription = await transcription_cache.get(audio_data)
+    if transcription is None:
+        transcription = await speech_to_text.transcribe(audio_data, deadline=deadline)
+        await transcription_cache.put(audio_data, transcription)
 
     thread_id = cl.user_session.get("thread_id")
+    msg = cl.Message(content="")
+    splitter = StreamedSentenceSplitter()
 
-    async with AsyncSqliteSaver.from_conn_string(
-        settings.SHORT_TERM_MEMORY_DB_PATH
-    ) as short_term_memory:
-        graph = graph_builder.compile(checkpointer=short_term_memory)
-        output_state = await graph.ainvoke(
-            {"messages": [HumanMessage(content=transcription)]},
-            {"configurable": {"thread_id": thread_id}},
-        )
-
-    # Use global TextToSpeech instance
-    audio_buffer = await text_to_speech.synthesize(output_state["messages"][-1].content)
-
-    output_audio_el = cl.Audio(
-        name="Audio",
-        auto_play=True,
-        mime="audio/mpeg3",
-        content=audio_buffer,
-    )
-    await cl.Message(
-        content=output_state["messages"][-1].content, elements=[output_audio_el]
-    ).send()
+    async def reply_sentences():
+        """Run the graph and yield the reply sentence by sentence as it is written."""
+        async with AsyncSqliteSaver.from_conn_string(
+            settings.SHORT_TERM_MEMORY_DB_PATH
+        ) as short_term_memory:
+            graph = graph_builder.compile(checkpointer=short_term_memory)
+            async for chunk in graph.astream(
+                {"messages": [HumanMessage(content=transcription)]},
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "deadline": deadline.expires_at,
+                        # The reply is spoken below for every workflow
+                        "synthesize_speech": False,
+                    }
+                },
+                stream_mode="messages",
+            ):
+                if chunk[1]["langgraph_node"] in RESPONSE_NODES and isinstance(
+                    chunk[0], AIMessageChunk
+                ):
+                    if sentences := splitter.feed(chunk[0].content):
+                        await msg.stream_token(sentences)
+                        yield sentences
+        if rest := splitter.flush():
+            await msg.stream_token(rest)
+            yield rest
+
+    # Each sentence is synthesized while the next ones are being written.
+    # Chainlit cannot play a growing audio stream, so the first segment is
+    # attached and starts playing as soon as it is ready, and the rest of the
+    # reply follows as a second clip timed to start when the first one ends
+    reply = SpokenReply(reply_sentences(), text_to_speech, deadline)
+    first_audio, later_segments, first_ends_at = None, [], 0.0
+    try:
+        async for segment in reply.audio_segments():
+            if first_audio is None:
+                first_audio = segment
+                msg.elements = [
+                    cl.Audio(
+                        name="Audio",
+                        auto_play=True,
+                        mime="audio/mpeg3",
+                        content=segment,
+                    )
+                ]
+                await msg.send()
+                first_ends_at = time.monotonic() + len(segment) / TTS_BYTES_PER_SECOND
+            else:
+                later_segments.append(segment)
+    except Exception as e:
+        cl.logger.warning(f"Failed to synthesize the reply: {e}")
+
+    await reply.text()
+    if first_audio is None:
+        await msg.send()
+        return
+
+    await msg.update()
+    if later_segments:
+        await asyncio.sleep(max(0.0, first_ends_at - time.monotonic()))
+        await cl.Audio(
+            name="Audio (continued)",
+            auto_play=True,
+            mime="audio/mpeg3",
+            content=b"".join(later_segments),
+        ).send(for_id=msg.id)
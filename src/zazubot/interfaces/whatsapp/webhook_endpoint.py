@@ -1,5 +1,57 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from zazu_bot.core.metrics import metrics, monitor_event_loop_lag
 from zazu_bot.interfaces.whatsapp.whatsapp_response import whatsapp_router
+from zazu_bot.modules.memory.long_term.memory_manager import (
+    close_long_term_memory,
+    warm_up_long_term_memory,
+)
+from zazu_bot.modules.speech.transcription_cache import get_transcription_cache
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Warm up long-term memory, then mark the app as ready."""
+    try:
+        await warm_up_long_term_memory()
+    except Exception as e:
+        logger.error(f"Failed to load the embedding model: {e}")
+        return
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background tasks for the lifetime of the application."""
+    app.state.ready = False
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    warmup = asyncio.create_task(warm_up(app))
+
+    yield
 
-app = FastAPI()
+    lag_monitor.cancel()
+    warmup.cancel()
+    await close_long_term_memory()
+    await get_transcription_cache().close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(whatsapp_router)
+
+
+@app.get("/ready")
+async def readiness_probe() -> JSONResponse:
+    """Report whether the embedding model is loaded and warmed up."""
+    ready = app.state.ready
+    return JSONResponse({"ready": ready}, status_code=200 if ready else 503)
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> dict:
+    """Expose in-process metrics such as circuit breaker states."""
+    return metrics.snapshot()
@@ -1,16 +1,23 @@
+import asyncio
 import logging
 import os
+import time
 from io import BytesIO
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional
 
 import httpx
 from fastapi import APIRouter, Request, Response
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
+from zazu_bot.core.circuit_breaker import GROQ_VISION, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
+from zazu_bot.core.metrics import metrics
 from zazu_bot.graph import graph_builder
+from zazu_bot.graph.utils.helpers import StreamedSentenceSplitter
 from zazu_bot.modules.image import ImageToText
-from zazu_bot.modules.speech import SpeechToText, TextToSpeech
+from zazu_bot.modules.speech import SpeechToText, SpokenReply, TextToSpeech
+from zazu_bot.modules.speech.transcription_cache import get_transcription_cache
 
 from zazu_bot.settings import settings
 
@@ -28,6 +35,9 @@ whatsapp_router = APIRouter()
 WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
 WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
 
+# Nodes whose update carries the text reply (or the image caption)
+RESPONSE_NODES = {"conversation_node", "image_caption_node", "audio_node"}
+
 
 @whatsapp_router.api_route("/whatsapp_response", methods=["GET", "POST"])
 async def whatsapp_handler(request: Request) -> Response:
@@ -39,6 +49,10 @@ async def whatsapp_handler(request: Request) -> Response:
             return Response(content=params.get("hub.challenge"), status_code=200)
         return Response(content="Verification token mismatch", status_code=403)
 
+    # The time budget for the whole turn starts as soon as the message arrives
+    deadline = Deadline.from_budget()
+    started_at = time.perf_counter()
+
     try:
         data = await request.json()
         change_value = data["entry"][0]["changes"][0]["value"]
@@ -50,20 +64,25 @@ async def whatsapp_handler(request: Request) -> Response:
             # Get user message and handle different message types
             content = ""
             if message["type"] == "audio":
-                content = await process_audio_message(message)
+                content = await process_audio_message(message, deadline)
             elif message["type"] == "image":
                 # Get image caption if any
                 content = message.get("image", {}).get("caption", "")
-                # Download and analyze image
-                image_bytes = await download_media(message["image"]["id"])
-                try:
-                    description = await image_to_text.analyze_image(
-                        image_bytes,
-                        "Please describe what you see in this image in the context of our conversation.",
-                    )
-                    content += f"\n[Image Analysis: {description}]"
-                except Exception as e:
-                    logger.warning(f"Failed to analyze image: {e}")
+                # Skip the analysis altogether while the vision model is failing
+                if not get_circuit_breaker(GROQ_VISION).has_capacity():
+                    logger.warning("Vision circuit is open, skipping image analysis")
+                else:
+                    # Download and analyze image
+                    try:
+                        image_bytes = await download_media(message["image"]["id"])
+                        description = await image_to_text.analyze_image(
+                            image_bytes,
+                            "Please describe what you see in this image in the context of our conversation.",
+                            deadline=deadline,
+                        )
+                        content += f"\n[Image Analysis: {description}]"
+                    except Exception as e:
+                        logger.warning(f"Failed to analyze image: {e}")
             else:
                 content = message["text"]["body"]
 
@@ -72,35 +91,22 @@ async def whatsapp_handler(request: Request) -> Response:
                 settings.SHORT_TERM_MEMORY_DB_PATH
             ) as short_term_memory:
                 graph = graph_builder.compile(checkpointer=short_term_memory)
-                await graph.ainvoke(
-                    {"messages": [HumanMessage(content=content)]},
-                    {"configurable": {"thread_id": session_id}},
-                )
-
-                # Get the workflow type and response from the state
-                output_state = await graph.aget_state(
-                    config={"configurable": {"thread_id": session_id}}
+                success = await stream_graph_responses(
+                    graph,
+                    from_number,
+                    content,
+                    {
+                        "configurable": {
+                            "thread_id": session_id,
+                            "deadline": deadline.expires_at,
+                            # Voice replies are spoken while they are written
+                            "synthesize_speech": False,
+                        }
+                    },
+                    started_at,
+                    deadline,
                 )
 
-            workflow = output_state.values.get("workflow", "conversation")
-            response_message = output_state.values["messages"][-1].content
-
-            # Handle different response types based on workflow
-            if workflow == "audio":
-                audio_buffer = output_state.values["audio_buffer"]
-                success = await send_response(
-                    from_number, response_message, "audio", audio_buffer
-                )
-            elif workflow == "image":
-                image_path = output_state.values["image_path"]
-                with open(image_path, "rb") as f:
-                    image_data = f.read()
-                success = await send_response(
-                    from_number, response_message, "image", image_data
-                )
-            else:
-                success = await send_response(from_number, response_message, "text")
-
             if not success:
                 return Response(content="Failed to send message", status_code=500)
 
@@ -117,6 +123,115 @@ async def whatsapp_handler(request: Request) -> Response:
         return Response(content="Internal server error", status_code=500)
 
 
+async def stream_graph_responses(
+    graph,
+    from_number: str,
+    content: str,
+    config: Dict,
+    started_at: float,
+    deadline: Deadline,
+) -> bool:
+    """Run the graph and deliver each part of the reply as soon as it is ready.
+
+    The text reply (or image caption) is sent as soon as the response node
+    finishes, and generated media follows as a separate message. A voice
+    reply is synthesized sentence by sentence while `audio_node` writes it,
+    so the voice note follows the text shortly after. Time to the first
+    visible response and time to full completion are tracked separately.
+
+    Returns:
+        bool: Whether every message was sent successfully
+    """
+    success = True
+    workflow = "conversation"
+    first_response_sent = False
+
+    # Sentences of the voice reply, spoken as they are written; owned by this run
+    splitter = StreamedSentenceSplitter()
+    sentences: asyncio.Queue = asyncio.Queue()
+    speech: Optional[asyncio.Task] = None
+
+    async def queued_sentences() -> AsyncIterator[str]:
+        while (sentence := await sentences.get()) is not None:
+            yield sentence
+
+    async def speak() -> bytes:
+        reply = SpokenReply(queued_sentences(), text_to_speech, deadline)
+        try:
+            return b"".join([segment async for segment in reply.audio_segments()])
+        except Exception as e:
+            # The text reply is sent anyway, the turn survives without audio
+            logger.warning(f"Speech synthesis failed: {e}")
+            return b""
+
+    try:
+        async for mode, chunk in graph.astream(
+            {"messages": [HumanMessage(content=content)]},
+            config,
+            stream_mode=["updates", "messages"],
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata["langgraph_node"] == "audio_node" and isinstance(
+                    message, AIMessageChunk
+                ):
+                    if speech is None:
+                        speech = asyncio.create_task(speak())
+                    if text := splitter.feed(message.content):
+                        sentences.put_nowait(text)
+                continue
+
+            for node, values in chunk.items():
+                values = values or {}
+
+                if node == "router_node":
+                    workflow = values.get("workflow", workflow)
+
+                elif node in RESPONSE_NODES:
+                    response_message = values["messages"].content
+                    if node == "audio_node":
+                        if speech is None:
+                            # The model did not stream, speak the whole reply
+                            speech = asyncio.create_task(speak())
+                            sentences.put_nowait(response_message)
+                        elif rest := splitter.flush():
+                            sentences.put_nowait(rest)
+                        sentences.put_nowait(None)
+
+                    success &= await send_response(
+                        from_number, response_message, "text"
+                    )
+                    if not first_response_sent:
+                        first_response_sent = True
+                        metrics.observe(
+                            "time_to_first_response_seconds",
+                            time.perf_counter() - started_at,
+                            workflow=workflow,
+                        )
+
+                elif node == "image_generation_node" and values.get("image_path"):
+                    with open(values["image_path"], "rb") as f:
+                        image_data = f.read()
+                    success &= await send_response(from_number, "", "image", image_data)
+
+                elif node == "text_to_speech_node" and speech is not None:
+                    if audio_buffer := await speech:
+                        success &= await send_response(
+                            from_number, "", "audio", audio_buffer
+                        )
+    finally:
+        # A failed or cancelled run must not keep synthesizing for nobody
+        if speech is not None and not speech.done():
+            speech.cancel()
+
+    metrics.observe(
+        "time_to_full_completion_seconds",
+        time.perf_counter() - started_at,
+        workflow=workflow,
+    )
+    return success
+
+
 async def download_media(media_id: str) -> bytes:
     """Download media from WhatsApp."""
     media_metadata_url = f"https://graph.facebook.com/v21.0/{media_id}"
@@ -133,7 +248,7 @@ async def download_media(media_id: str) -> bytes:
         return media_response.content
 
 
-async def process_audio_message(message: Dict) -> str:
+async def process_audio_message(message: Dict, deadline: Deadline) -> str:
     """Download and transcribe audio message."""
     audio_id = message["audio"]["id"]
     media_metadata_url = f"https://graph.facebook.com/v21.0/{audio_id}"
@@ -150,12 +265,15 @@ async def process_audio_message(message: Dict) -> str:
         audio_response = await client.get(download_url, headers=headers)
         audio_response.raise_for_status()
 
-    # Prepare for transcription
-    audio_buffer = BytesIO(audio_response.content)
-    audio_buffer.seek(0)
-    audio_data = audio_buffer.read()
+    audio_data = audio_response.content
 
-    return await speech_to_text.transcribe(audio_data)
+    # Forwarded notes and webhook retries carry the same bytes, skip the upload
+    transcription_cache = get_transcription_cache()
+    transcription = await transcription_cache.get(audio_data)
+    if transcription is None:
+        transcription = await speech_to_text.transcribe(audio_data, deadline=deadline)
+        await transcription_cache.put(audio_data, transcription)
+    return transcription
 
 
 async def send_response(
@@ -183,9 +301,13 @@ async def send_response(
             }
 
             # Add caption for images
-            if message_type == "image":
+            if message_type == "image" and response_text:
                 json_data["image"]["caption"] = response_text
         except Exception as e:
+            if not response_text:
+                # Media follow-up without text, there is nothing to fall back to
+                logger.error(f"Media upload failed: {e}")
+                return False
             logger.error(f"Media upload failed, falling back to text: {e}")
             message_type = "text"
 
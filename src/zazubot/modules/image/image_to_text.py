@@ -2,9 +2,11 @@ import os
 import base64
 from typing import Optional, Union
 import logging
-from groq import Groq
+from groq import AsyncGroq
 
 from zazu_bot.settings import settings
+from zazu_bot.core.circuit_breaker import GROQ_VISION, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.core.exceptions import ImageToTextError
 
 
@@ -16,7 +18,7 @@ class ImageToText:
     def __init__(self):
         """Initialize the ImageToText class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[Groq] = None
+        self._client: Optional[AsyncGroq] = None
         self.logger = logging.getLogger(__name__)
 
     def _validate_env_vars(self) -> None:
@@ -28,20 +30,24 @@ class ImageToText:
             )
 
     @property
-    def client(self) -> Groq:
+    def client(self) -> AsyncGroq:
         """Get or create Groq client instance using singleton pattern."""
         if self._client is None:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            self._client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         return self._client
 
     async def analyze_image(
-        self, image_data: Union[str, bytes], prompt: str = ""
+        self,
+        image_data: Union[str, bytes],
+        prompt: str = "",
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """Analyze an image using Groq's vision capabilities.
 
         Args:
             image_data: Either a file path (str) or binary image data (bytes)
             prompt: Optional prompt to guide the image analysis
+            deadline: Optional request deadline bounding the API call
 
         Returns:
             str: Description or analysis of the image
@@ -50,7 +56,11 @@ class ImageToText:
             ValueError: If the image data is empty or invalid
             ImageToTextError: If the image analysis fails
         """
+        deadline = deadline or Deadline.unbounded()
+
         try:
+            deadline.check("image analysis")
+
             # Handle file path
             if isinstance(image_data, str):
                 if not os.path.exists(image_data):
@@ -87,11 +97,13 @@ class ImageToText:
             ]
 
             # Make the API call
-            response = self.client.chat.completions.create(
-                model=settings.ITT_MODEL_NAME,
-                messages=messages,
-                max_tokens=1000,
-            )
+            with get_circuit_breaker(GROQ_VISION).protect(deadline):
+                response = await self.client.chat.completions.create(
+                    model=settings.ITT_MODEL_NAME,
+                    messages=messages,
+                    max_tokens=1000,
+                    **({"timeout": deadline.timeout()} if deadline.is_bounded else {}),
+                )
 
             if not response.choices:
                 raise ImageToTextError("No response received from the vision model")
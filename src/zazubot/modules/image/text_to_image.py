@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import logging
 import os
@@ -6,9 +7,11 @@ from typing import Optional
 from langchain.prompts import PromptTemplate
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
-from together import Together
+from together import AsyncTogether
 
-from zazu_bot.core.exceptions import TextToImageError
+from zazu_bot.core.circuit_breaker import TOGETHER, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
+from zazu_bot.core.exceptions import DeadlineExceededError, TextToImageError
 from zazu_bot.core.prompts import IMAGE_ENHANCEMENT_PROMPT, IMAGE_SCENARIO_PROMPT
 from zazu_bot.settings import settings
 
@@ -41,7 +44,7 @@ class TextToImage:
     def __init__(self):
         """Initialize the TextToImage class and validate environment variables."""
         self._validate_env_vars()
-        self._together_client: Optional[Together] = None
+        self._together_client: Optional[AsyncTogether] = None
         self.logger = logging.getLogger(__name__)
 
     def _validate_env_vars(self) -> None:
@@ -53,29 +56,50 @@ class TextToImage:
             )
 
     @property
-    def together_client(self) -> Together:
+    def together_client(self) -> AsyncTogether:
         """Get or create Together client instance using singleton pattern."""
         if self._together_client is None:
-            self._together_client = Together(api_key=settings.TOGETHER_API_KEY)
+            self._together_client = AsyncTogether(api_key=settings.TOGETHER_API_KEY)
         return self._together_client
 
-    async def generate_image(self, prompt: str, output_path: str = "") -> bytes:
+    async def generate_image(
+        self,
+        prompt: str,
+        output_path: str = "",
+        deadline: Optional[Deadline] = None,
+    ) -> bytes:
         """Generate an image from a prompt using Together AI."""
         if not prompt.strip():
             raise ValueError("Prompt cannot be empty")
 
+        deadline = deadline or Deadline.unbounded()
+
         try:
+            deadline.check("image generation")
             self.logger.info(f"Generating image for prompt: '{prompt}'")
 
-            response = self.together_client.images.generate(
-                prompt=prompt,
-                model=settings.TTI_MODEL_NAME,
-                width=1024,
-                height=768,
-                steps=4,
-                n=1,
-                response_format="b64_json",
-            )
+            with get_circuit_breaker(TOGETHER).protect(deadline):
+                # The Together SDK takes no per-request timeout, so the call
+                # is cancelled once the remaining budget runs out
+                try:
+                    response = await asyncio.wait_for(
+                        self.together_client.images.generate(
+                            prompt=prompt,
+                            model=settings.TTI_MODEL_NAME,
+                            width=1024,
+                            height=768,
+                            steps=4,
+                            n=1,
+                            response_format="b64_json",
+                        ),
+                        timeout=deadline.timeout(),
+                    )
+                except asyncio.TimeoutError:
+                    if not deadline.expired:
+                        raise
+                    raise DeadlineExceededError(
+                        "Deadline exceeded during image generation"
+                    )
 
             image_data = base64.b64decode(response.data[0].b64_json)
 
@@ -90,9 +114,14 @@ class TextToImage:
         except Exception as e:
             raise TextToImageError(f"Failed to generate image: {str(e)}") from e
 
-    async def create_scenario(self, chat_history: list = None) -> ScenarioPrompt:
+    async def create_scenario(
+        self, chat_history: list = None, deadline: Optional[Deadline] = None
+    ) -> ScenarioPrompt:
         """Creates a first-person narrative scenario and corresponding image prompt based on chat history."""
+        deadline = deadline or Deadline.unbounded()
+
         try:
+            deadline.check("scenario creation")
             formatted_history = "\n".join(
                 [f"{msg.type.title()}: {msg.content}" for msg in chat_history[-5:]]
             )
@@ -104,6 +133,7 @@ class TextToImage:
                 api_key=settings.GROQ_API_KEY,
                 temperature=0.4,
                 max_retries=2,
+                timeout=deadline.timeout(),
             )
 
             structured_llm = llm.with_structured_output(ScenarioPrompt)
@@ -116,7 +146,7 @@ class TextToImage:
                 | structured_llm
             )
 
-            scenario = chain.invoke({"chat_history": formatted_history})
+            scenario = await chain.ainvoke({"chat_history": formatted_history})
             self.logger.info(f"Created scenario: {scenario}")
 
             return scenario
@@ -146,7 +176,7 @@ class TextToImage:
                 | structured_llm
             )
 
-            enhanced_prompt = chain.invoke({"prompt": prompt}).content
+            enhanced_prompt = (await chain.ainvoke({"prompt": prompt})).content
             self.logger.info(f"Enhanced prompt: '{enhanced_prompt}'")
 
             return enhanced_prompt
@@ -0,0 +1,257 @@
+"""
+Maintenance commands for the long-term memory store.
+
+Usage:
+    python -m zazu_bot.modules.memory.long_term.cli tune [--collection NAME]
+    python -m zazu_bot.modules.memory.long_term.cli consolidate [--checkpoint PATH]
+    python -m zazu_bot.modules.memory.long_term.cli backfill --thread-id ID [--collection NAME]
+    python -m zazu_bot.modules.memory.long_term.cli alias --alias NAME --collection NAME
+    python -m zazu_bot.modules.memory.long_term.cli migrate --source NAME --target NAME \
+        [--alias NAME] [--model MODEL] [--checkpoint PATH]
+
+Migrations flip an alias, so a deployment serving from a real collection
+(e.g. the default "long_term_memory") first needs an alias over it:
+
+    cli alias --alias memories --collection long_term_memory
+
+then MEMORY_COLLECTION_NAME=memories and a restart, after which
+`migrate --source long_term_memory --target ... --alias memories` is
+zero-downtime.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from qdrant_client.models import (
+    Filter,
+    IsEmptyCondition,
+    PayloadField,
+    PointIdsList,
+)
+
+from zazu_bot.modules.memory.long_term.consolidation import (
+    MemoryConsolidator,
+    summarize_reports,
+)
+from zazu_bot.modules.memory.long_term.migration import MemoryMigrator
+from zazu_bot.modules.memory.long_term.qdrant_backend import QdrantBackend
+from zazu_bot.modules.memory.long_term.vector_backend import VectorPoint
+from zazu_bot.modules.memory.long_term.vector_store import get_vector_store, memory_id
+from zazu_bot.settings import settings
+
+
+async def tune(args: argparse.Namespace) -> None:
+    """Apply the configured quantization, HNSW and on-disk settings to existing collections."""
+    backend = get_vector_store().backend
+    if not isinstance(backend, QdrantBackend):
+        raise SystemExit("The tune command only applies to the qdrant vector backend")
+    await backend.apply_collection_config(args.collection)
+
+
+async def consolidate(args: argparse.Namespace) -> None:
+    """Expire stale memories and merge redundant ones for every user."""
+    vector_store = get_vector_store()
+    consolidator = MemoryConsolidator(
+        vector_store,
+        similarity_threshold=args.similarity,
+        max_age_days=args.max_age_days,
+        use_llm=args.use_llm,
+        dry_run=args.dry_run,
+    )
+    try:
+        reports = await consolidator.run(args.checkpoint, batch_size=args.batch_size)
+    finally:
+        await vector_store.close()
+
+    summary = summarize_reports(reports)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+    print(
+        f"Consolidated {summary['threads']} threads: {summary['before']} -> "
+        f"{summary['after']} memories ({summary['shrink_ratio']:.0%} smaller)"
+    )
+
+
+async def backfill(args: argparse.Namespace) -> None:
+    """
+    Give memories stored before per-user partitioning an owner.
+
+    Those memories have no thread id, so the per-user search filter never
+    matches them. They are re-keyed with `memory_id(text, thread_id)`, written
+    to the collection of that thread and deleted from the old collection.
+    """
+    vector_store = get_vector_store()
+    backend = vector_store.backend
+    if not isinstance(backend, QdrantBackend):
+        raise SystemExit(
+            "The backfill command only applies to the qdrant vector backend"
+        )
+
+    collection_name = args.collection or backend.COLLECTION_NAME
+    unowned = Filter(
+        must=[IsEmptyCondition(is_empty=PayloadField(key=backend.PARTITION_FIELD))]
+    )
+    moved = 0
+    try:
+        while True:
+            # Re-keyed points leave the filter, so always read the first page
+            records, _ = await backend.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=unowned,
+                limit=settings.MEMORY_SCROLL_PAGE_SIZE,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if not records:
+                break
+
+            points = []
+            for record in records:
+                point_id = memory_id(record.payload["text"], args.thread_id)
+                points.append(
+                    VectorPoint(
+                        thread_id=args.thread_id,
+                        point_id=point_id,
+                        vector=record.vector,
+                        payload={**record.payload, "id": point_id},
+                    )
+                )
+            # Write first, an interruption then only leaves duplicates
+            await backend.upsert_many(points)
+            await backend.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=[record.id for record in records]),
+            )
+            moved += len(records)
+    finally:
+        await vector_store.close()
+
+    print(
+        f"Assigned {moved} memories from '{collection_name}' to thread {args.thread_id}"
+    )
+
+
+async def alias(args: argparse.Namespace) -> None:
+    """Create or move an alias over an existing collection."""
+    backend = QdrantBackend(dimension=0)  # Only aliases are touched
+    try:
+        await backend.point_alias(args.alias, args.collection)
+    finally:
+        await backend.close()
+
+
+async def migrate(args: argparse.Namespace) -> None:
+    """Re-embed a collection into a new one and flip the alias to it."""
+    migrator = MemoryMigrator(
+        source=args.source,
+        target=args.target,
+        model_name=args.model,
+        page_size=args.page_size,
+        encode_batch_size=args.batch_size,
+    )
+    copied = await migrator.run(args.alias, args.checkpoint)
+    print(f"Migrated {copied} memories from '{args.source}' to '{args.target}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    tune_parser = subparsers.add_parser(
+        "tune", help="Migrate existing collections to the current QDRANT_* settings"
+    )
+    tune_parser.add_argument(
+        "--collection", default=None, help="Single collection to update (default: all)"
+    )
+    tune_parser.set_defaults(handler=tune)
+
+    consolidate_parser = subparsers.add_parser(
+        "consolidate", help="Merge redundant and expire stale memories per user"
+    )
+    consolidate_parser.add_argument(
+        "--checkpoint", default=None, help="JSON file used to resume an interrupted run"
+    )
+    consolidate_parser.add_argument("--batch-size", type=int, default=16)
+    consolidate_parser.add_argument(
+        "--similarity", type=float, default=settings.MEMORY_CONSOLIDATION_SIMILARITY
+    )
+    consolidate_parser.add_argument(
+        "--max-age-days", type=int, default=settings.MEMORY_MAX_AGE_DAYS
+    )
+    consolidate_parser.add_argument(
+        "--use-llm",
+        action="store_true",
+        help="Merge clusters with the LLM, otherwise they are only reported",
+    )
+    consolidate_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Log the clusters to merge, without writing or calling the LLM",
+    )
+    consolidate_parser.add_argument(
+        "--report", default=None, help="Write per-user results to this JSON file"
+    )
+    consolidate_parser.set_defaults(handler=consolidate)
+
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Assign memories stored without a thread id to one thread"
+    )
+    backfill_parser.add_argument(
+        "--thread-id", required=True, help="Thread (user) the memories belong to"
+    )
+    backfill_parser.add_argument(
+        "--collection",
+        default=None,
+        help="Collection holding the old memories (default: MEMORY_COLLECTION_NAME)",
+    )
+    backfill_parser.set_defaults(handler=backfill)
+
+    alias_parser = subparsers.add_parser(
+        "alias", help="Point an alias to a collection, e.g. before the first migration"
+    )
+    alias_parser.add_argument(
+        "--alias", required=True, help="Alias the app serves from"
+    )
+    alias_parser.add_argument(
+        "--collection", required=True, help="Existing collection the alias points to"
+    )
+    alias_parser.set_defaults(handler=alias)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Re-embed memories into a new collection and flip the alias"
+    )
+    migrate_parser.add_argument(
+        "--source", required=True, help="Collection to read from"
+    )
+    migrate_parser.add_argument(
+        "--target", required=True, help="Collection to write to"
+    )
+    migrate_parser.add_argument(
+        "--alias",
+        default=None,
+        help="Alias flipped to the target at the end (e.g. MEMORY_COLLECTION_NAME)",
+    )
+    migrate_parser.add_argument(
+        "--model",
+        default=settings.EMBEDDING_MODEL,
+        help="Embedding model of the target",
+    )
+    migrate_parser.add_argument(
+        "--checkpoint", default=None, help="JSON file used to resume an interrupted run"
+    )
+    migrate_parser.add_argument(
+        "--page-size", type=int, default=settings.MEMORY_SCROLL_PAGE_SIZE
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=64)
+    migrate_parser.set_defaults(handler=migrate)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field
+
+from zazu_bot.core.prompts import MEMORY_MERGE_PROMPT
+from zazu_bot.modules.memory.long_term.vector_backend import VectorPoint
+from zazu_bot.modules.memory.long_term.vector_store import VectorStore, memory_id
+from zazu_bot.settings import settings
+
+
+class MergedMemory(BaseModel):
+    """Single memory replacing a cluster of redundant ones."""
+
+    formatted_memory: str = Field(..., description="Merged, third-person memory")
+
+
+@dataclass
+class ConsolidationReport:
+    """Outcome of consolidating one user's memories."""
+
+    thread_id: str
+    before: int  # Memories before consolidation
+    after: int  # Memories after consolidation
+    expired: int  # Memories dropped because they were too old
+    merged: int  # Memories folded into another one
+    redundant: int  # Memories found redundant with another one, merged or not
+
+    @property
+    def shrink_ratio(self) -> float:
+        return 1 - self.after / self.before if self.before else 0.0
+
+
+def _timestamp(point: VectorPoint) -> Optional[datetime]:
+    ts = point.payload.get("timestamp")
+    return datetime.fromisoformat(ts) if ts else None
+
+
+def _age_key(point: VectorPoint) -> datetime:
+    """Sort key putting memories without a timestamp first, as the oldest."""
+    return _timestamp(point) or datetime.min
+
+
+def _is_expired(point: VectorPoint, cutoff: datetime) -> bool:
+    """Memories without a timestamp predate timestamping and are kept."""
+    timestamp = _timestamp(point)
+    return timestamp is not None and timestamp < cutoff
+
+
+def cluster_points(
+    points: List[VectorPoint], threshold: float
+) -> List[List[VectorPoint]]:
+    """
+    Group points whose embeddings are all pairwise at least `threshold` similar.
+
+    Clusters are complete-linkage: a point joins the first cluster it is
+    similar to every member of, so related but distinct memories ("likes
+    pizza", "likes pasta", "likes sushi") do not chain into one cluster.
+    Per-user memory sets are small, so the full cosine similarity matrix is
+    computed.
+    """
+    if not points:
+        return []
+
+    vectors = np.stack([np.asarray(point.vector, dtype=np.float32) for point in points])
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similar = vectors @ vectors.T >= threshold
+
+    clusters: List[List[int]] = []
+    for i in range(len(points)):
+        for members in clusters:
+            if similar[i, members].all():
+                members.append(i)
+                break
+        else:
+            clusters.append([i])
+    return [[points[i] for i in members] for members in clusters]
+
+
+class MemoryConsolidator:
+    """
+    Offline job that shrinks each user's long-term memory set.
+
+    For every thread it scrolls all memories, drops the ones older than
+    `max_age_days` and clusters the rest by embedding similarity. With
+    `use_llm`, each cluster of redundant memories is replaced by a single
+    LLM-written merge; a cluster is only deleted once its merge succeeded,
+    and the merge is written before the cluster is deleted, so an
+    interrupted run never loses information. Without `use_llm`, clusters
+    are only logged and reported. Memories without a timestamp never expire.
+
+    A dry run only logs the clusters it would merge: nothing is written and
+    the LLM is not called.
+
+    Threads are processed in sorted order, `batch_size` at a time, and the
+    last completed thread is saved to a checkpoint file so an interrupted
+    run resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        similarity_threshold: float = settings.MEMORY_CONSOLIDATION_SIMILARITY,
+        max_age_days: Optional[int] = settings.MEMORY_MAX_AGE_DAYS,
+        use_llm: bool = False,
+        dry_run: bool = False,
+    ) -> None:
+        self.vector_store = vector_store
+        self.backend = vector_store.backend
+        self.similarity_threshold = similarity_threshold
+        self.max_age_days = max_age_days
+        self.dry_run = dry_run
+        self.logger = logging.getLogger(__name__)
+        self.llm = None
+        if use_llm:
+            self.llm = ChatGroq(
+                model=settings.SMALL_TEXT_MODEL_NAME,
+                api_key=settings.GROQ_API_KEY,
+                temperature=0.1,
+                max_retries=2,
+            ).with_structured_output(MergedMemory)
+
+    async def _merge(
+        self, thread_id: str, cluster: List[VectorPoint]
+    ) -> Optional[VectorPoint]:
+        """
+        Build the single point replacing a cluster, newest memory last in `cluster`.
+
+        Returns:
+            The merged point, or None if the LLM merge failed
+        """
+        newest = cluster[-1]
+        facts = "\n".join(
+            f"- ({_age_key(point).date()}) {point.payload['text']}" for point in cluster
+        )
+        try:
+            merged = await self.llm.ainvoke(MEMORY_MERGE_PROMPT.format(facts=facts))
+        except Exception as e:
+            self.logger.warning(
+                f"LLM merge failed for thread {thread_id}, keeping the cluster: {e}"
+            )
+            return None
+
+        text = merged.formatted_memory
+        embedding = await self.vector_store._embed(text)
+        return VectorPoint(
+            thread_id=thread_id,
+            point_id=memory_id(text, thread_id),
+            vector=embedding,
+            payload={**newest.payload, "text": text, "id": memory_id(text, thread_id)},
+        )
+
+    async def consolidate_thread(self, thread_id: str) -> ConsolidationReport:
+        """Expire and merge the memories of one thread."""
+        points = await self.backend.get_thread_points(thread_id)
+        before = len(points)
+
+        to_delete: List[str] = []
+        if self.max_age_days is not None:
+            cutoff = datetime.now() - timedelta(days=self.max_age_days)
+            expired = [point for point in points if _is_expired(point, cutoff)]
+            to_delete.extend(point.point_id for point in expired)
+            points = [point for point in points if not _is_expired(point, cutoff)]
+        expired_count = len(to_delete)
+
+        to_upsert: List[VectorPoint] = []
+        merged_count = redundant_count = 0
+        for cluster in cluster_points(points, self.similarity_threshold):
+            if len(cluster) == 1:
+                continue
+            cluster.sort(key=_age_key)
+            redundant_count += len(cluster) - 1
+            if self.llm is None or self.dry_run:
+                texts = "; ".join(point.payload["text"] for point in cluster)
+                self.logger.info(f"Thread {thread_id} has redundant memories: {texts}")
+                if self.llm is not None:
+                    merged_count += len(cluster) - 1
+                continue
+
+            merged = await self._merge(thread_id, cluster)
+            if merged is None:
+                continue
+            merged_count += len(cluster) - 1
+            to_upsert.append(merged)
+            to_delete.extend(
+                point.point_id for point in cluster if point.point_id != merged.point_id
+            )
+
+        report = ConsolidationReport(
+            thread_id=thread_id,
+            before=before,
+            after=before - expired_count - merged_count,
+            expired=expired_count,
+            merged=merged_count,
+            redundant=redundant_count,
+        )
+        if self.dry_run or not to_delete:
+            return report
+
+        # Write merged memories first, an interruption then only leaves duplicates
+        if to_upsert:
+            await self.backend.upsert_many(to_upsert)
+        await self.backend.delete(thread_id, to_delete)
+        self.vector_store.retrieval_cache.bump(thread_id)
+        return report
+
+    async def run(
+        self, checkpoint_path: Optional[str] = None, batch_size: int = 16
+    ) -> List[ConsolidationReport]:
+        """
+        Consolidate every thread, resuming after the checkpointed one.
+
+        Args:
+            checkpoint_path: JSON file recording the last completed thread
+            batch_size: Threads consolidated concurrently between checkpoints
+
+        Returns:
+            One report per thread processed in this run
+        """
+        last_done = None
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                last_done = json.load(f).get("last_thread_id")
+            self.logger.info(f"Resuming consolidation after thread {last_done}")
+
+        thread_ids = await self.backend.list_thread_ids()
+        if last_done is not None:
+            thread_ids = [
+                thread_id for thread_id in thread_ids if thread_id > last_done
+            ]
+
+        reports: List[ConsolidationReport] = []
+        for start in range(0, len(thread_ids), batch_size):
+            batch = thread_ids[start : start + batch_size]
+            reports.extend(
+                await asyncio.gather(*(self.consolidate_thread(t) for t in batch))
+            )
+            for report in reports[-len(batch) :]:
+                self.logger.info(
+                    f"Thread {report.thread_id}: {report.before} -> {report.after} "
+                    f"memories ({report.shrink_ratio:.0%} smaller, "
+                    f"{report.expired} expired, {report.merged} merged, "
+                    f"{report.redundant} redundant)"
+                )
+
+            if checkpoint_path and not self.dry_run:
+                with open(f"{checkpoint_path}.tmp", "w") as f:
+                    json.dump({"last_thread_id": batch[-1]}, f)
+                os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+
+        return reports
+
+
+def summarize_reports(reports: List[ConsolidationReport]) -> dict:
+    """Totals over a consolidation run, for logging or JSON output."""
+    before = sum(report.before for report in reports)
+    after = sum(report.after for report in reports)
+    return {
+        "threads": len(reports),
+        "before": before,
+        "after": after,
+        "shrink_ratio": 1 - after / before if before else 0.0,
+        "reports": [asdict(report) for report in reports],
+    }
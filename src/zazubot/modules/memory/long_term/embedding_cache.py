@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.settings import settings
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different texts share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings keyed by model name plus normalized text.
+
+    Keys are 16-byte digests and vectors are stored as read-only float32
+    arrays. Entries are evicted least recently used first once the stored
+    vectors exceed `max_bytes`. The cache can optionally be persisted to an
+    `.npz` file so it survives restarts.
+    """
+
+    KEY_SIZE = 16  # Bytes of the blake2b digest used as key
+
+    def __init__(
+        self,
+        model_name: str,
+        max_bytes: int = settings.EMBEDDING_CACHE_MAX_BYTES,
+        path: Optional[str] = settings.EMBEDDING_CACHE_PATH,
+    ) -> None:
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.path:
+            self.load()
+
+    def _key(self, text: str) -> bytes:
+        data = f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=self.KEY_SIZE).digest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("embedding_cache_hit_rate", self.hit_rate)
+        metrics.set_gauge("embedding_cache_bytes", self._size_bytes)
+        metrics.set_gauge("embedding_cache_entries", len(self._entries))
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the cached embedding of a text.
+
+        Returns:
+            The embedding if cached, None otherwise
+        """
+        key = self._key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                metrics.increment("embedding_cache_misses_total")
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.increment("embedding_cache_hits_total")
+            self._publish()
+        return embedding
+
+    def put(self, text: str, embedding: np.ndarray) -> None:
+        """Store the embedding of a text, evicting old entries if over budget."""
+        self._put_key(self._key(text), embedding)
+
+    def _put_key(self, key: bytes, embedding: np.ndarray) -> None:
+        vector = np.array(embedding, dtype=np.float32)
+        vector.flags.writeable = False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous.nbytes
+
+            self._entries[key] = vector
+            self._size_bytes += vector.nbytes
+
+            while self._size_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= evicted.nbytes
+                metrics.increment("embedding_cache_evictions_total")
+            self._publish()
+
+    def save(self) -> None:
+        """Persist the cache to `path`, written atomically."""
+        if not self.path:
+            return
+
+        with self._lock:
+            if not self._entries:
+                return
+            keys = np.frombuffer(b"".join(self._entries.keys()), dtype=np.uint8)
+            vectors = np.stack(list(self._entries.values()))
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            model_name=np.array(self.model_name),
+            keys=keys.reshape(-1, self.KEY_SIZE),
+            vectors=vectors,
+        )
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Saved {len(vectors)} cached embeddings to {self.path}")
+
+    def load(self) -> None:
+        """Load a cache previously persisted with `save`, if any."""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    self.logger.info(
+                        "Ignoring embedding cache built with another model"
+                    )
+                    return
+                # Entries were saved least recently used first
+                for key, vector in zip(data["keys"], data["vectors"]):
+                    self._put_key(key.tobytes(), vector)
+        except Exception as e:
+            self.logger.warning(f"Failed to load embedding cache from {self.path}: {e}")
+            return
+
+        self.logger.info(f"Loaded {len(self)} cached embeddings from {self.path}")
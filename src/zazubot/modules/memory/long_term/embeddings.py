@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from zazu_bot.core.executors import run_in_embedding_executor
+from zazu_bot.core.metrics import current_rss_bytes, metrics
+from zazu_bot.modules.memory.long_term.embedding_cache import EmbeddingCache
+from zazu_bot.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_embedding_model(
+    model_name: str,
+    backend: str = settings.EMBEDDING_BACKEND,
+    model_file: Optional[str] = settings.EMBEDDING_MODEL_FILE,
+) -> SentenceTransformer:
+    """
+    Load the sentence transformer with the configured inference runtime.
+
+    The ONNX and OpenVINO runtimes skip most of the PyTorch startup cost and,
+    with an int8 `model_file`, also shrink memory use. If the optional runtime
+    is not installed, the PyTorch model is loaded instead. Load time and the
+    RSS growth it caused are published per backend.
+
+    Args:
+        model_name: Sentence transformer model name or path
+        backend: "torch", "onnx" or "openvino"
+        model_file: Model file inside the repository, e.g. a quantized ONNX export
+    """
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+
+    try:
+        if backend == "torch":
+            model = SentenceTransformer(model_name)
+        else:
+            model_kwargs = {"file_name": model_file} if model_file else None
+            model = SentenceTransformer(
+                model_name, backend=backend, model_kwargs=model_kwargs
+            )
+    except Exception as e:
+        if backend == "torch":
+            raise
+        logger.warning(f"Failed to load {backend} embedding model, using torch: {e}")
+        backend = "torch"
+        model = SentenceTransformer(model_name)
+
+    load_seconds = time.perf_counter() - start
+    rss_delta = current_rss_bytes() - rss_before
+    metrics.set_gauge("embedding_model_load_seconds", load_seconds, backend=backend)
+    metrics.set_gauge("embedding_model_rss_bytes", rss_delta, backend=backend)
+    logger.info(
+        f"Loaded embedding model {model_name} ({backend}) in {load_seconds:.2f}s, "
+        f"RSS +{rss_delta / 2**20:.0f} MB"
+    )
+    return model
+
+
+class EmbeddingService:
+    """
+    Micro-batching front end for the sentence transformer model.
+
+    Encode requests coming from concurrent turns are collected for at most
+    `max_wait_ms` milliseconds (or until `max_batch_size` texts are waiting)
+    and embedded with a single batched `encode` call on the embedding
+    executor. Each caller awaits its own future and gets its own vector.
+
+    When a cache is given, texts embedded before are served from it without
+    touching the model.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        max_batch_size: int = settings.EMBEDDING_MAX_BATCH_SIZE,
+        max_wait_ms: float = settings.EMBEDDING_MAX_WAIT_MS,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> None:
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> None:
+        """Start the batching worker on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def warmup(self) -> None:
+        """
+        Run a first encode so lazy initialisation is not paid by a user turn.
+
+        Bypasses the cache and the batching queue and publishes the time of
+        the first encode as `embedding_warmup_seconds`.
+        """
+        start = time.perf_counter()
+        await run_in_embedding_executor(self.model.encode, ["warmup"])
+        warmup_seconds = time.perf_counter() - start
+        metrics.set_gauge("embedding_warmup_seconds", warmup_seconds)
+        metrics.set_gauge("process_rss_bytes", current_rss_bytes())
+        self.logger.info(f"Embedding model warmed up in {warmup_seconds:.2f}s")
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a single text, batched together with concurrent requests.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            The embedding vector of the text
+        """
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed several texts, sharing batches with concurrent requests."""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for a request, then collect more until the batch is full or the wait is over."""
+        batch = [await self._queue.get()]
+        batch_deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = batch_deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        """Worker loop that turns queued requests into batched encode calls."""
+        while True:
+            batch = await self._next_batch()
+            # Requests whose caller went away do not need to be embedded
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if batch:
+                await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Embed a batch of texts and resolve each caller's future."""
+        texts = [text for text, _ in batch]
+        metrics.observe("embedding_batch_size", len(texts))
+
+        try:
+            embeddings = await run_in_embedding_executor(self.model.encode, texts)
+        except Exception as e:
+            self.logger.error(f"Failed to embed a batch of {len(texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (text, future), embedding in zip(batch, embeddings):
+            if self.cache is not None:
+                self.cache.put(text, embedding)
+            if not future.done():
+                future.set_result(embedding)
@@ -0,0 +1,328 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from zazu_bot.core.executors import run_in_storage_executor
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.memory.long_term.vector_backend import VectorBackend, VectorPoint
+from zazu_bot.settings import settings
+
+
+class LocalBackend(VectorBackend):
+    """
+    In-process vector backend for single-node deployments and tests.
+
+    The store is an append-only list of segments: a memory-mapped `.npy` file
+    of vectors next to a JSON file with their ids, payloads and the ids
+    deleted since the previous segment, so only the rows that are actually
+    searched are paged in. Points written since the last flush are kept in
+    memory and appended as a new segment every `LOCAL_VECTOR_FLUSH_ROWS`
+    points, at most `LOCAL_VECTOR_FLUSH_SECONDS` after a write, and on close.
+
+    The segments making up the store are listed in a manifest replaced with
+    a single rename, so a crash leaves either the previous or the next state
+    of the store, never a mix of both. A flush only writes the new points,
+    except once overwritten and deleted rows make up half of the store or
+    `MAX_SEGMENTS` segments accumulate: the live rows are then compacted
+    into a single segment.
+
+    Search is exact: the rows of the queried thread are gathered and scored
+    with a single matrix-vector product, which is cheap at per-user memory
+    counts and avoids a network hop per turn.
+
+    The store is owned by a single process: an exclusive file lock is held
+    from construction to `close`, so e.g. the maintenance CLIs refuse to run
+    against the store of a running server instead of corrupting it.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    # Single segment of stores written before the manifest existed
+    VECTORS_FILE = "vectors.npy"
+    POINTS_FILE = "points.json"
+    LOCK_FILE = ".lock"
+    MAX_SEGMENTS = 32
+
+    def __init__(
+        self, dimension: int, path: str = settings.LOCAL_VECTOR_STORE_PATH
+    ) -> None:
+        self.dimension = dimension
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._lock_file = self._acquire_file_lock()
+        self._load()
+
+    def _acquire_file_lock(self):
+        """Take the exclusive inter-process lock on the store directory."""
+        os.makedirs(self.path, exist_ok=True)
+        lock_file = open(os.path.join(self.path, self.LOCK_FILE), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Local vector store at {self.path} is in use by another process"
+            )
+        return lock_file
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_manifest(self) -> dict:
+        if os.path.exists(self._file(self.MANIFEST_FILE)):
+            with open(self._file(self.MANIFEST_FILE)) as f:
+                return json.load(f)
+        if os.path.exists(self._file(self.VECTORS_FILE)) and os.path.exists(
+            self._file(self.POINTS_FILE)
+        ):
+            legacy = {"vectors": self.VECTORS_FILE, "points": self.POINTS_FILE}
+            return {"segments": [legacy], "next_segment": 0}
+        return {"segments": [], "next_segment": 0}
+
+    def _add_row(self, point_id: str, payload: dict) -> None:
+        row = len(self._ids)
+        self._ids.append(point_id)
+        self._payloads.append(payload)
+        self._row_by_id[point_id] = row
+        self._rows_by_thread[payload[self.PARTITION_FIELD]].append(row)
+
+    def _load(self) -> None:
+        """(Re)build the in-memory index from the segments of the manifest."""
+        self._manifest = self._read_manifest()
+        self._segments: List[np.ndarray] = []  # Memory-mapped vectors per segment
+        self._offsets: List[int] = []  # First row of every segment
+        self._ids: List[str] = []
+        self._payloads: List[dict] = []
+        self._row_by_id: Dict[str, int] = {}  # Live row of every point
+        self._rows_by_thread: Dict[str, List[int]] = defaultdict(list)
+
+        for segment in self._manifest["segments"]:
+            with open(self._file(segment["points"])) as f:
+                points = json.load(f)
+            vectors = np.empty((0, self.dimension), dtype=np.float32)
+            if points["ids"]:
+                vectors = np.load(self._file(segment["vectors"]), mmap_mode="r")
+            if vectors.shape != (len(points["ids"]), self.dimension):
+                raise RuntimeError(
+                    f"Local vector store at {self.path} is corrupt: "
+                    f"{segment['vectors']} holds {vectors.shape} vectors "
+                    f"for {len(points['ids'])} points"
+                )
+
+            self._offsets.append(len(self._ids))
+            self._segments.append(vectors)
+            for point_id, payload in zip(points["ids"], points["payloads"]):
+                self._add_row(point_id, payload)
+            for point_id in points.get("deleted", []):
+                self._row_by_id.pop(point_id, None)
+
+        self._flushed = len(self._ids)  # Rows stored in segments
+        self._pending: List[np.ndarray] = []  # Vectors of rows past the flushed ones
+        self._deleted: Set[str] = set()  # Points deleted since the last flush
+
+    def _gather(self, rows: List[int]) -> np.ndarray:
+        """Stack the vectors of the given rows, reading flushed ones from the memmaps."""
+        vectors = np.empty((len(rows), self.dimension), dtype=np.float32)
+        by_segment: Dict[int, Tuple[List[int], List[int]]] = defaultdict(
+            lambda: ([], [])
+        )
+        for position, row in enumerate(rows):
+            if row >= self._flushed:
+                vectors[position] = self._pending[row - self._flushed]
+                continue
+            segment = bisect_right(self._offsets, row) - 1
+            positions, segment_rows = by_segment[segment]
+            positions.append(position)
+            segment_rows.append(row - self._offsets[segment])
+
+        for segment, (positions, segment_rows) in by_segment.items():
+            vectors[positions] = self._segments[segment][segment_rows]
+        return vectors
+
+    def _live_rows(self, thread_id: str) -> List[int]:
+        """Rows of a thread that have not been overwritten, flushed rows first."""
+        return [
+            row
+            for row in self._rows_by_thread.get(thread_id, [])
+            if self._row_by_id.get(self._ids[row]) == row
+        ]
+
+    def _schedule_flush(self) -> None:
+        """Flush at most `LOCAL_VECTOR_FLUSH_SECONDS` after the first unflushed write."""
+        if self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(settings.LOCAL_VECTOR_FLUSH_SECONDS)
+        try:
+            # Shielded, so closing the store never interrupts a flush half-way
+            await asyncio.shield(self.flush())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Failed to flush local vector store {self.path}: {e}")
+
+    async def setup(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+    async def upsert_many(self, points: List[VectorPoint]) -> None:
+        async with self._lock:
+            for point in points:
+                vector = np.asarray(point.vector, dtype=np.float32)
+                vector = vector / (np.linalg.norm(vector) or 1.0)
+
+                # Overwritten rows stay in place until a compaction drops them
+                self._pending.append(vector)
+                self._add_row(
+                    point.point_id,
+                    {**point.payload, self.PARTITION_FIELD: point.thread_id},
+                )
+                self._deleted.discard(point.point_id)
+
+        metrics.increment("local_vector_calls_total", operation="upsert")
+        if len(self._pending) >= settings.LOCAL_VECTOR_FLUSH_ROWS:
+            await self.flush()
+        else:
+            self._schedule_flush()
+
+    async def search(
+        self, thread_id: str, vector: np.ndarray, k: int
+    ) -> List[Tuple[dict, float]]:
+        metrics.increment("local_vector_calls_total", operation="search")
+        rows = self._live_rows(thread_id)
+        if not rows:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self._gather(rows) @ query
+
+        top = np.argsort(-scores)[:k]
+        return [(self._payloads[rows[i]], float(scores[i])) for i in top]
+
+    async def list_thread_ids(self) -> List[str]:
+        return sorted(
+            thread_id
+            for thread_id in self._rows_by_thread
+            if self._live_rows(thread_id)
+        )
+
+    async def get_thread_points(self, thread_id: str) -> List[VectorPoint]:
+        rows = self._live_rows(thread_id)
+        vectors = self._gather(rows)
+        return [
+            VectorPoint(thread_id, self._ids[row], vector, self._payloads[row])
+            for row, vector in zip(rows, vectors)
+        ]
+
+    async def delete(self, thread_id: str, point_ids: List[str]) -> None:
+        async with self._lock:
+            # Deleted rows are dropped from the files by the next compaction
+            for point_id in point_ids:
+                row = self._row_by_id.get(point_id)
+                if (
+                    row is not None
+                    and self._payloads[row][self.PARTITION_FIELD] == thread_id
+                ):
+                    del self._row_by_id[point_id]
+                    self._deleted.add(point_id)
+        metrics.increment("local_vector_calls_total", operation="delete")
+        if self._deleted:
+            self._schedule_flush()
+
+    def _write_segment(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        payloads: List[dict],
+        deleted: List[str],
+        compact: bool,
+    ) -> None:
+        """Write a segment, then swap it into the manifest with a single rename."""
+        number = self._manifest["next_segment"]
+        segment = {
+            "vectors": f"vectors-{number}.npy",
+            "points": f"points-{number}.json",
+        }
+
+        with open(self._file(segment["vectors"]), "wb") as f:
+            np.save(f, vectors)
+            os.fsync(f.fileno())
+        with open(self._file(segment["points"]), "w") as f:
+            json.dump({"ids": ids, "payloads": payloads, "deleted": deleted}, f)
+            os.fsync(f.fileno())
+
+        previous = self._manifest["segments"]
+        manifest = {
+            "segments": [segment] if compact else [*previous, segment],
+            "next_segment": number + 1,
+        }
+        manifest_path = self._file(self.MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump(manifest, f)
+            os.fsync(f.fileno())
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        self._manifest = manifest
+
+        if compact:
+            for old in previous:
+                for name in (old["vectors"], old["points"]):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(self._file(name))
+
+    async def flush(self) -> None:
+        """
+        Persist pending points and deletions as a new segment.
+
+        When overwritten and deleted rows make up half of the store, or too
+        many segments accumulate, the live rows are compacted into a single
+        segment instead. The segments are then memory-mapped again, so the
+        pending buffer is emptied.
+        """
+        async with self._lock:
+            if not self._pending and not self._deleted:
+                return
+
+            compact = (
+                len(self._ids) >= 2 * len(self._row_by_id)
+                or len(self._segments) >= self.MAX_SEGMENTS
+            )
+            if compact:
+                rows = sorted(self._row_by_id.values())
+                deleted = []
+            else:
+                rows = [
+                    row
+                    for row in range(self._flushed, len(self._ids))
+                    if self._row_by_id.get(self._ids[row]) == row
+                ]
+                deleted = sorted(self._deleted)
+
+            vectors = self._gather(rows)
+            ids = [self._ids[row] for row in rows]
+            payloads = [self._payloads[row] for row in rows]
+
+            await run_in_storage_executor(
+                self._write_segment, vectors, ids, payloads, deleted, compact
+            )
+            self._load()
+
+        action = "Compacted" if compact else "Appended"
+        self.logger.info(f"{action} {len(ids)} memory vectors to {self.path}")
+
+    async def close(self) -> None:
+        if self._flush_timer is not None and not self._flush_timer.done():
+            self._flush_timer.cancel()
+        await self.flush()
+        if not self._lock_file.closed:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.core.prompts import MEMORY_ANALYSIS_PROMPT, MEMORY_BATCH_ANALYSIS_PROMPT
+from zazu_bot.settings import settings
+
+
+class MemoryAnalysis(BaseModel):
+    """
+    Represents the result of analyzing a message for memory storage.
+
+    Determines if a message contains important information
+    and provides a formatted memory if applicable.
+    """
+
+    is_important: bool = Field(
+        ...,
+        description="Whether the message contains significant information to store",
+    )
+    formatted_memory: Optional[str] = Field(
+        ..., description="Processed and structured memory content"
+    )
+
+
+class MessageAnalysis(MemoryAnalysis):
+    """Analysis of one message of a batch, tagged with the message id."""
+
+    id: str = Field(..., description="Id of the analyzed message")
+
+
+class BatchMemoryAnalysis(BaseModel):
+    """Results of analyzing a batch of messages, one per message."""
+
+    results: List[MessageAnalysis] = Field(
+        ..., description="One analysis per input message"
+    )
+
+
+class MemoryAnalyzer:
+    """
+    Batches memory-analysis requests into shared structured-output LLM calls.
+
+    Messages queued within `max_wait` seconds (up to `max_batch_size`), from
+    any user, are analyzed with a single call. Messages are sent with
+    batch-local ids only, and results are mapped back to each caller's
+    future by id. A message whose result is missing from the response is
+    analyzed on its own, so a sloppy batch answer never loses a memory.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = settings.MEMORY_ANALYSIS_BATCH_SIZE,
+        max_wait: float = settings.MEMORY_ANALYSIS_MAX_WAIT_SECONDS,
+    ) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.logger = logging.getLogger(__name__)
+
+        llm = ChatGroq(
+            model=settings.SMALL_TEXT_MODEL_NAME,
+            api_key=settings.GROQ_API_KEY,
+            temperature=0.1,  # Low temperature for consistent analysis
+            max_retries=2,
+        )
+        self.llm = llm.with_structured_output(MemoryAnalysis)
+        self.batch_llm = llm.with_structured_output(BatchMemoryAnalysis)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batches: Set[asyncio.Task] = set()  # Batches being analyzed
+
+    def _ensure_worker(self) -> None:
+        """Start the batching worker on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def analyze(self, message: str) -> MemoryAnalysis:
+        """
+        Analyze a message, batched together with concurrent requests.
+
+        Args:
+            message: Input message text to analyze
+
+        Returns:
+            MemoryAnalysis with importance and formatted memory
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((message, future))
+        return await future
+
+    async def _analyze_one(self, message: str) -> MemoryAnalysis:
+        metrics.increment("memory_analysis_llm_calls_total", mode="single")
+        return await self.llm.ainvoke(MEMORY_ANALYSIS_PROMPT.format(message=message))
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for a request, then collect more until the batch is full or the wait is over."""
+        batch = [await self._queue.get()]
+        batch_deadline = self._loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = batch_deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        """Worker loop that turns queued requests into batched LLM calls."""
+        while True:
+            batch = await self._next_batch()
+            batch = [
+                (message, future) for message, future in batch if not future.done()
+            ]
+            if batch:
+                # Do not hold up the next batch while this one is analyzed
+                task = self._loop.create_task(self._analyze_batch(batch))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+
+    async def close(self) -> None:
+        """Wait for the batches being analyzed, then stop the worker."""
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    async def _analyze_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Analyze a batch with one call and resolve each caller's future."""
+        metrics.observe("memory_analysis_batch_size", len(batch))
+
+        try:
+            if len(batch) == 1:
+                results = {"0": await self._analyze_one(batch[0][0])}
+            else:
+                results = await self._call_batch([message for message, _ in batch])
+        except Exception as e:
+            self.logger.error(
+                f"Failed to analyze a batch of {len(batch)} messages: {e}"
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (message, future) in enumerate(batch):
+            if future.done():
+                continue
+            analysis = results.get(str(index))
+            if analysis is None:
+                metrics.increment("memory_analysis_missing_results_total")
+                try:
+                    analysis = await self._analyze_one(message)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+            future.set_result(analysis)
+
+    async def _call_batch(self, messages: List[str]) -> dict:
+        """Analyze several messages in one structured-output call, keyed by id."""
+        payload = json.dumps(
+            [{"id": str(i), "message": message} for i, message in enumerate(messages)],
+            ensure_ascii=False,
+        )
+        metrics.increment("memory_analysis_llm_calls_total", mode="batch")
+        response = await self.batch_llm.ainvoke(
+            MEMORY_BATCH_ANALYSIS_PROMPT.format(messages=payload)
+        )
+        return {
+            result.id: MemoryAnalysis(
+                is_important=result.is_important,
+                formatted_memory=result.formatted_memory,
+            )
+            for result in response.results
+        }
+
+
+@lru_cache
+def get_memory_analyzer() -> MemoryAnalyzer:
+    """Shared analyzer, so messages of every turn and user share batches."""
+    return MemoryAnalyzer()
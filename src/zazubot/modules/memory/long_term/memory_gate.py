@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import random
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.memory.long_term.vector_store import get_vector_store
+from zazu_bot.settings import settings
+
+# Fillers that never carry a fact on their own
+FILLER_WORDS = {
+    "ok",
+    "okay",
+    "k",
+    "kk",
+    "lol",
+    "lmao",
+    "haha",
+    "hahaha",
+    "hehe",
+    "hi",
+    "hey",
+    "hello",
+    "yo",
+    "sup",
+    "thanks",
+    "thx",
+    "ty",
+    "yes",
+    "yeah",
+    "yep",
+    "no",
+    "nope",
+    "sure",
+    "cool",
+    "nice",
+    "great",
+    "good",
+    "wow",
+    "omg",
+    "hmm",
+    "bye",
+    "night",
+    "morning",
+    "what",
+    "why",
+    "really",
+    "right",
+    "true",
+    "xd",
+}
+
+# First-person statements that usually introduce a personal fact
+FACT_CUES = re.compile(
+    r"\b(i am|i'm|im|my|i work|i live|i love|i like|i hate|i have|i've|i was|"
+    r"i will|i'll|i study|i moved|call me|years old|born|mine)\b",
+    re.IGNORECASE,
+)
+
+TRIVIAL_PROTOTYPES = [
+    "ok",
+    "haha that's funny",
+    "hello, how are you?",
+    "thanks!",
+    "good night",
+    "what are you doing?",
+    "tell me a joke",
+    "send me a picture",
+    "yes, sure",
+]
+
+FACT_PROTOTYPES = [
+    "my name is Alex",
+    "I work as a nurse at the city hospital",
+    "I live in Madrid with my girlfriend",
+    "I love playing guitar and hiking",
+    "I have two cats",
+    "I'm 27 years old",
+    "my sister is getting married next month",
+    "I'm studying computer science",
+]
+
+
+@dataclass
+class GateDecision:
+    """Whether a message should skip memory analysis, and why."""
+
+    skip: bool
+    reason: str  # "empty", "short", "filler", "fact_cue" or "classifier"
+    score: Optional[float] = None  # Classifier score when it was consulted
+
+
+class MemoryGate:
+    """
+    Cheap local filter run before the memory-analysis LLM call.
+
+    Heuristics handle the obvious cases first: messages without letters,
+    very short ones and ones made only of filler words are skipped, while
+    first-person fact cues ("I work", "my ...") always go to the LLM.
+    Everything else is scored by an embedding classifier: the similarity to
+    the closest fact-like prototype minus the similarity to the closest
+    trivial one. Messages scoring below `threshold` are skipped.
+
+    A small `audit_rate` of skipped messages is still analyzed so false
+    negatives can be logged and the threshold tuned.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.MEMORY_GATE_THRESHOLD,
+        min_chars: int = settings.MEMORY_GATE_MIN_CHARS,
+        audit_rate: float = settings.MEMORY_GATE_AUDIT_RATE,
+    ) -> None:
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self.audit_rate = audit_rate
+        self.logger = logging.getLogger(__name__)
+        self.checked = 0
+        self.skipped = 0
+
+        self._prototypes: Optional[tuple] = None
+        self._prototypes_lock = asyncio.Lock()
+
+    async def _prototype_vectors(self) -> tuple:
+        """Unit embeddings of the trivial and fact prototypes, computed once."""
+        async with self._prototypes_lock:
+            if self._prototypes is None:
+                service = get_vector_store().embedding_service
+                trivial = np.stack(await service.embed_many(TRIVIAL_PROTOTYPES))
+                facts = np.stack(await service.embed_many(FACT_PROTOTYPES))
+                self._prototypes = (self._unit(trivial), self._unit(facts))
+        return self._prototypes
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _heuristics(self, text: str) -> Optional[GateDecision]:
+        """Decide from the text alone, or return None when unsure."""
+        if not re.search(r"[^\W\d_]", text):
+            return GateDecision(skip=True, reason="empty")
+        if FACT_CUES.search(text):
+            return GateDecision(skip=False, reason="fact_cue")
+        if len(text) < self.min_chars:
+            return GateDecision(skip=True, reason="short")
+        words: List[str] = re.findall(r"[^\W\d_]+", text.lower())
+        if all(word in FILLER_WORDS for word in words):
+            return GateDecision(skip=True, reason="filler")
+        return None
+
+    async def score(self, text: str) -> float:
+        """Fact-likeness of a message: closest fact minus closest trivial prototype."""
+        trivial, facts = await self._prototype_vectors()
+        embedding = await get_vector_store().embedding_service.embed(text)
+        query = self._unit(embedding)
+        return float(np.max(facts @ query) - np.max(trivial @ query))
+
+    async def check(self, text: str) -> GateDecision:
+        """Decide whether a message can skip the memory-analysis LLM call."""
+        text = text.strip()
+        decision = self._heuristics(text)
+        if decision is None:
+            score = await self.score(text)
+            decision = GateDecision(
+                skip=score < self.threshold, reason="classifier", score=score
+            )
+
+        self.checked += 1
+        self.skipped += decision.skip
+        metrics.increment(
+            "memory_gate_decisions_total",
+            decision="skip" if decision.skip else "analyze",
+            reason=decision.reason,
+        )
+        metrics.set_gauge("memory_gate_skip_rate", self.skipped / self.checked)
+        return decision
+
+    def should_audit(self, decision: GateDecision) -> bool:
+        """Whether a skipped message should be analyzed anyway to sample false negatives."""
+        return decision.skip and random.random() < self.audit_rate
+
+    def record_false_negative(self, text: str, decision: GateDecision) -> None:
+        """Log a skipped message the LLM found important."""
+        metrics.increment("memory_gate_false_negatives_total", reason=decision.reason)
+        self.logger.warning(
+            f"Memory gate false negative ({decision.reason}, score={decision.score}): "
+            f"'{text[:200]}'"
+        )
+
+
+@lru_cache
+def get_memory_gate() -> MemoryGate:
+    """Shared gate, so prototype embeddings are computed once per process."""
+    return MemoryGate()
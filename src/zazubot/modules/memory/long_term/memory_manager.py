@@ -1,39 +1,28 @@
+import asyncio
 import logging
-import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Set
 
 from langchain_core.messages import BaseMessage
-from langchain_groq import ChatGroq
-from pydantic import BaseModel, Field
 
-from zazu_bot.core.prompts import MEMORY_ANALYSIS_PROMPT
-from zazu_bot.modules.memory.long_term.vector_store import get_vector_store
+from zazu_bot.core.executors import run_in_embedding_executor
+from zazu_bot.modules.memory.long_term.memory_analyzer import (
+    MemoryAnalysis,
+    get_memory_analyzer,
+)
+from zazu_bot.modules.memory.long_term.memory_gate import get_memory_gate
+from zazu_bot.modules.memory.long_term.vector_store import (
+    close_vector_store,
+    get_vector_store,
+)
 from zazu_bot.settings import settings
 
 
-class MemoryAnalysis(BaseModel):
-    """
-    Represents the result of analyzing a message for memory storage.
-    
-    Determines if a message contains important information 
-    and provides a formatted memory if applicable.
-    """
-
-    is_important: bool = Field(
-        ...,
-        description="Whether the message contains significant information to store",
-    )
-    formatted_memory: Optional[str] = Field(
-        ..., description="Processed and structured memory content"
-    )
-
-
 class MemoryManager:
     """
     Manages long-term memory operations for the AI system.
-    
-    Handles memory extraction, storage, and retrieval using 
+
+    Handles memory extraction, storage, and retrieval using
     a vector store and language model for analysis.
     """
 
@@ -42,80 +31,83 @@ class MemoryManager:
         Initialize memory management components:
         - Vector store for persistent memory storage
         - Logger for tracking memory operations
-        - Language model for memory analysis
+        - Batched language model analyzer for memory analysis
         """
         self.vector_store = get_vector_store()
+        self.gate = get_memory_gate()
+        self.analyzer = get_memory_analyzer()
         self.logger = logging.getLogger(__name__)
-        self.llm = ChatGroq(
-            model=settings.SMALL_TEXT_MODEL_NAME,
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.1,  # Low temperature for consistent analysis
-            max_retries=2,
-        ).with_structured_output(MemoryAnalysis)
 
     async def _analyze_memory(self, message: str) -> MemoryAnalysis:
         """
         Analyze a message to determine its importance for long-term memory.
-        
-        Uses a language model to evaluate and format the message.
-        
+
+        Uses a language model to evaluate and format the message. Concurrent
+        requests are batched into one call by the shared analyzer.
+
         Args:
             message: Input message text to analyze
-        
+
         Returns:
             MemoryAnalysis with importance and formatted memory
         """
-        prompt = MEMORY_ANALYSIS_PROMPT.format(message=message)
-        return await self.llm.ainvoke(prompt)
+        return await self.analyzer.analyze(message)
 
-    async def extract_and_store_memories(self, message: BaseMessage) -> None:
+    async def extract_and_store_memories(
+        self, message: BaseMessage, thread_id: str
+    ) -> None:
         """
         Extract and store important memories from incoming messages.
-        
+
         Skips non-human messages and checks for memory uniqueness.
+        Trivial messages are filtered by the memory gate before the LLM call.
         Stores unique, important memories in the vector store.
-        
+
         Args:
             message: Message to potentially convert into a memory
+            thread_id: Conversation thread (user) the memory belongs to
         """
         if message.type != "human":
             return
 
+        decision = None
+        if settings.MEMORY_GATE_ENABLED:
+            decision = await self.gate.check(message.content)
+            if decision.skip and not self.gate.should_audit(decision):
+                return
+
         # Analyze the message for importance and formatting
         analysis = await self._analyze_memory(message.content)
+        if decision and decision.skip and analysis.is_important:
+            self.gate.record_false_negative(message.content, decision)
         if analysis.is_important and analysis.formatted_memory:
-            # Check if similar memory exists
-            similar = self.vector_store.find_similar_memory(analysis.formatted_memory)
-            if similar:
-                # Skip storage if we already have a similar memory
-                self.logger.info(
-                    f"Similar memory already exists: '{analysis.formatted_memory}'"
-                )
-                return
-
-            # Store new memory
-            self.logger.info(f"Storing new memory: '{analysis.formatted_memory}'")
-            self.vector_store.store_memory(
+            # Store the memory unless a similar one exists (one embedding, one search)
+            stored = await self.vector_store.add_memory(
                 text=analysis.formatted_memory,
+                thread_id=thread_id,
                 metadata={
-                    "id": str(uuid.uuid4()),  # Generate unique identifier
                     "timestamp": datetime.now().isoformat(),  # Record creation time
                 },
             )
+            if stored:
+                self.logger.info(f"Stored new memory: '{analysis.formatted_memory}'")
 
-    def get_relevant_memories(self, context: str) -> List[str]:
+    async def get_relevant_memories(self, context: str, thread_id: str) -> List[str]:
         """
-        Retrieve memories most relevant to the given context.
-        
+        Retrieve a user's memories most relevant to the given context.
+
         Searches vector store and logs retrieved memories.
-        
+
         Args:
             context: Text to find relevant memories for
-        
+            thread_id: Conversation thread (user) whose memories are searched
+
         Returns:
             List of memory texts sorted by relevance
         """
-        memories = self.vector_store.search_memories(context, k=settings.MEMORY_TOP_K)
+        memories = await self.vector_store.search_memories(
+            context, thread_id, k=settings.MEMORY_TOP_K
+        )
         if memories:
             for memory in memories:
                 self.logger.debug(
@@ -126,10 +118,10 @@ class MemoryManager:
     def format_memories_for_prompt(self, memories: List[str]) -> str:
         """
         Convert memory list into a formatted string for prompting.
-        
+
         Args:
             memories: List of memory texts
-        
+
         Returns:
             Memories formatted as bullet-point list, or empty string
         """
@@ -141,8 +133,66 @@ class MemoryManager:
 def get_memory_manager() -> MemoryManager:
     """
     Singleton-like function to retrieve Memory Manager instance.
-    
+
     Returns:
         MemoryManager for handling long-term memory operations
     """
-    return MemoryManager()
\ No newline at end of file
+    return MemoryManager()
+
+
+# Background extraction tasks, referenced so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def extract_memories_in_background(message: BaseMessage, thread_id: str) -> None:
+    """
+    Run memory extraction without making the current turn wait for it.
+
+    Analysis of messages from concurrent turns is then batched by the shared
+    analyzer. Failures are logged, never raised to the turn.
+    """
+
+    async def extract() -> None:
+        try:
+            await get_memory_manager().extract_and_store_memories(message, thread_id)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Memory extraction failed: {e}")
+
+    task = asyncio.create_task(extract())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def warm_up_long_term_memory() -> None:
+    """
+    Load and warm up the embedding model and prepare the memory backend.
+
+    Loading the model blocks, so the store is built on the embedding
+    executor while the app already serves requests.
+    """
+    vector_store = await run_in_embedding_executor(get_vector_store)
+
+    # Prepare the memory backend once, instead of probing it on every call
+    try:
+        await vector_store.ensure_collection()
+    except Exception as e:
+        logging.getLogger(__name__).warning(
+            f"Long-term memory collection not ready at startup: {e}"
+        )
+
+    await vector_store.warmup()
+
+
+async def close_long_term_memory() -> None:
+    """
+    Shut long-term memory down without losing writes.
+
+    In-flight background extractions are finished first, so they do not
+    restart a write worker on a closed backend; the memory analyzer is
+    stopped once its last batches are analyzed, then queued writes are
+    flushed and the store is closed.
+    """
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await get_memory_analyzer().close()
+    await close_vector_store()
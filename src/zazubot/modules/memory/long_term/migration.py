@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from qdrant_client.models import PointIdsList, PointStruct, Record
+
+from zazu_bot.core.executors import run_in_embedding_executor
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.memory.long_term.embeddings import load_embedding_model
+from zazu_bot.modules.memory.long_term.qdrant_backend import QdrantBackend
+from zazu_bot.settings import settings
+
+
+class MemoryMigrator:
+    """
+    Copies memories into a new Qdrant collection, re-embedding them on the way.
+
+    The source collection is scrolled page by page while earlier pages are
+    embedded and bulk-upserted, so only a couple of pages are ever held in
+    memory. After every written page the scroll offset is saved to a
+    checkpoint file, so an interrupted migration resumes where it stopped.
+
+    Point ids do not depend on the embedding model, so writes are idempotent.
+    Changes made to the source while the copy runs (new, updated and deleted
+    memories) are synced by a catch-up pass right before the alias is flipped
+    to the target. Memories written in the short window between that pass and
+    the flip are copied by a final pass afterwards; deletions in that window
+    are not, so consolidation must not run during a migration. The app keeps
+    serving from the alias the whole time.
+
+    The alias must already exist: on an older deployment where the served
+    name is a real collection, create an alias over it first with the `alias`
+    command and point MEMORY_COLLECTION_NAME to that alias.
+    """
+
+    PAGES_IN_FLIGHT = 2  # Pages read ahead while the current one is embedded
+
+    def __init__(
+        self,
+        source: str,
+        target: str,
+        model_name: str = settings.EMBEDDING_MODEL,
+        page_size: int = settings.MEMORY_SCROLL_PAGE_SIZE,
+        encode_batch_size: int = 64,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.model_name = model_name
+        self.page_size = page_size
+        self.encode_batch_size = encode_batch_size
+        self.logger = logging.getLogger(__name__)
+
+        self.model = load_embedding_model(model_name)
+        self.backend = QdrantBackend(self.model.get_sentence_embedding_dimension())
+        self.client = self.backend.client
+
+    async def _scroll(self, queue: asyncio.Queue, offset: Optional[str]) -> None:
+        """
+        Producer: read pages from the source and queue them with the next offset.
+
+        A failed read is queued as well, so the consumer raises it instead of
+        waiting forever; the copy then resumes from the checkpoint.
+        """
+        try:
+            while True:
+                records, offset = await self.client.scroll(
+                    collection_name=self.source,
+                    limit=self.page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                await queue.put((records, offset))
+                if offset is None:
+                    return
+        except Exception as e:
+            await queue.put(e)
+
+    async def _copy(self, records: List[Record]) -> None:
+        """Re-embed a page of records and bulk-upsert them into the target."""
+        if not records:
+            return
+
+        texts = [record.payload["text"] for record in records]
+        embeddings = await run_in_embedding_executor(
+            self.model.encode, texts, batch_size=self.encode_batch_size
+        )
+        await self.client.upsert(
+            collection_name=self.target,
+            points=[
+                PointStruct(
+                    id=record.id, vector=embedding.tolist(), payload=record.payload
+                )
+                for record, embedding in zip(records, embeddings)
+            ],
+        )
+        metrics.increment("memory_migration_points_total", len(records))
+
+    def _load_checkpoint(self, path: Optional[str]) -> Tuple[Optional[str], int, bool]:
+        if not path or not os.path.exists(path):
+            return None, 0, False
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint["source"] != self.source or checkpoint["target"] != self.target:
+            raise ValueError(f"Checkpoint {path} belongs to another migration")
+        return checkpoint["offset"], checkpoint["copied"], checkpoint["done"]
+
+    def _save_checkpoint(
+        self, path: Optional[str], offset: Optional[str], copied: int, done: bool
+    ) -> None:
+        if not path:
+            return
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(
+                {
+                    "source": self.source,
+                    "target": self.target,
+                    "offset": offset,
+                    "copied": copied,
+                    "done": done,
+                },
+                f,
+            )
+        os.replace(f"{path}.tmp", path)
+
+    async def copy_all(self, checkpoint_path: Optional[str] = None) -> int:
+        """
+        Stream every source point into the target, resuming from the checkpoint.
+
+        Returns:
+            Number of points copied, including earlier runs
+        """
+        offset, copied, done = self._load_checkpoint(checkpoint_path)
+        if done:
+            self.logger.info("Copy already completed according to the checkpoint")
+            return copied
+
+        await self.backend.ensure_collection(self.target, behind_alias=False)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.PAGES_IN_FLIGHT)
+        producer = asyncio.create_task(self._scroll(queue, offset))
+        try:
+            while True:
+                page = await queue.get()
+                if isinstance(page, Exception):
+                    raise page
+                records, next_offset = page
+                await self._copy(records)
+                copied += len(records)
+                self._save_checkpoint(
+                    checkpoint_path, next_offset, copied, next_offset is None
+                )
+                self.logger.info(f"Copied {copied} memories to '{self.target}'")
+                if next_offset is None:
+                    break
+        finally:
+            producer.cancel()
+
+        return copied
+
+    async def _scroll_all(self, collection_name: str, with_payload: bool):
+        """Yield every page of records of a collection."""
+        offset = None
+        while True:
+            records, offset = await self.client.scroll(
+                collection_name=collection_name,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False,
+            )
+            yield records
+            if offset is None:
+                return
+
+    async def catch_up(self, sync_changes: bool = True) -> int:
+        """
+        Copy source changes the target is missing, e.g. made during the copy.
+
+        Points missing from the target are copied. With `sync_changes`, points
+        whose payload differs are re-copied and points deleted from the source
+        are deleted from the target too. Unchanged points are not re-embedded.
+
+        Args:
+            sync_changes: False to only copy missing points, e.g. once the
+                alias points to the target and it receives writes of its own
+
+        Returns:
+            Number of points copied or deleted by this pass
+        """
+        changed = 0
+        async for records in self._scroll_all(self.source, with_payload=True):
+            existing = await self.client.retrieve(
+                collection_name=self.target,
+                ids=[record.id for record in records],
+                with_payload=sync_changes,
+                with_vectors=False,
+            )
+            target_payloads = {point.id: point.payload for point in existing}
+            stale = [
+                record
+                for record in records
+                if record.id not in target_payloads
+                or (sync_changes and target_payloads[record.id] != record.payload)
+            ]
+            await self._copy(stale)
+            changed += len(stale)
+
+        if not sync_changes:
+            return changed
+
+        async for records in self._scroll_all(self.target, with_payload=False):
+            existing = await self.client.retrieve(
+                collection_name=self.source,
+                ids=[record.id for record in records],
+                with_payload=False,
+                with_vectors=False,
+            )
+            source_ids = {point.id for point in existing}
+            deleted = [record.id for record in records if record.id not in source_ids]
+            if deleted:
+                await self.client.delete(
+                    collection_name=self.target,
+                    points_selector=PointIdsList(points=deleted),
+                )
+                changed += len(deleted)
+        return changed
+
+    async def flip_alias(self, alias: str) -> None:
+        """Atomically point `alias` to the target collection."""
+        await self.backend.point_alias(alias, self.target)
+
+    async def run(
+        self, alias: Optional[str], checkpoint_path: Optional[str] = None
+    ) -> int:
+        """
+        Copy, catch up and flip the alias.
+
+        Args:
+            alias: Alias to flip to the target when done, or None to skip it
+            checkpoint_path: JSON file used to resume an interrupted copy
+
+        Returns:
+            Total number of points copied
+        """
+        try:
+            # Fail before the long copy rather than after it
+            if alias and await self.client.collection_exists(alias):
+                raise ValueError(
+                    f"'{alias}' is a collection, not an alias; create an alias over it "
+                    "with the `alias` command first"
+                )
+
+            copied = await self.copy_all(checkpoint_path)
+            caught_up = await self.catch_up()
+            self.logger.info(f"Catch-up pass synced {caught_up} memories")
+
+            if alias:
+                await self.flip_alias(alias)
+                # Writes that reached the source right before the flip
+                late = await self.catch_up(sync_changes=False)
+                self.logger.info(
+                    f"Final pass copied {late} memories written during the flip"
+                )
+                caught_up += late
+            return copied + caught_up
+        finally:
+            await self.client.close()
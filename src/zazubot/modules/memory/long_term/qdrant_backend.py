@@ -0,0 +1,452 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    CollectionParamsDiff,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.memory.long_term.vector_backend import VectorBackend, VectorPoint
+from zazu_bot.settings import settings
+
+
+class QdrantBackend(VectorBackend):
+    """
+    Vector backend storing memories in a Qdrant server.
+
+    Memories are partitioned per user by the `thread_id` payload field, which
+    has a keyword (tenant) index, and every search is filtered on it. With
+    `MEMORY_PARTITIONING="payload"` all users share one collection; with
+    `"collection"` users are spread over `MEMORY_COLLECTION_SHARDS` collections.
+    """
+
+    REQUIRED_ENV_VARS = ["QDRANT_URL", "QDRANT_API_KEY"]  # Environment variables needed
+    COLLECTION_NAME = (
+        settings.MEMORY_COLLECTION_NAME
+    )  # Collection or alias (prefix when sharded)
+    BACKING_SUFFIX = "_v1"  # Suffix of the collection created behind a new alias
+
+    def __init__(self, dimension: int) -> None:
+        self._validate_env_vars()
+        self.dimension = dimension
+        self.client = AsyncQdrantClient(
+            url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY
+        )
+        self.logger = logging.getLogger(__name__)
+        self._ready_collections: set[str] = set()  # Cached ensure_collection results
+        self._collection_lock = asyncio.Lock()
+
+    def _validate_env_vars(self) -> None:
+        """
+        Check that all required environment variables are set.
+
+        Raises a ValueError if any required variables are missing.
+        """
+        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
+        if missing_vars:
+            raise ValueError(
+                f"Missing required environment variables: {', '.join(missing_vars)}"
+            )
+
+    def collection_names(self) -> List[str]:
+        """Names of every collection used by the configured partitioning layout."""
+        if settings.MEMORY_PARTITIONING == "collection":
+            return [
+                f"{self.COLLECTION_NAME}_{shard}"
+                for shard in range(settings.MEMORY_COLLECTION_SHARDS)
+            ]
+        return [self.COLLECTION_NAME]
+
+    def _collection_name(self, thread_id: str) -> str:
+        """
+        Name of the collection holding a user's memories.
+
+        The shard is derived from a stable digest of the thread id, so a user
+        always lands in the same collection across processes and restarts.
+        """
+        if settings.MEMORY_PARTITIONING == "collection":
+            digest = hashlib.blake2b(thread_id.encode("utf-8"), digest_size=8).digest()
+            shard = int.from_bytes(digest, "big") % settings.MEMORY_COLLECTION_SHARDS
+            return f"{self.COLLECTION_NAME}_{shard}"
+        return self.COLLECTION_NAME
+
+    def _thread_filter(self, thread_id: str) -> Filter:
+        """Filter restricting a query to the memories of a single user."""
+        return Filter(
+            must=[
+                FieldCondition(
+                    key=self.PARTITION_FIELD, match=MatchValue(value=thread_id)
+                )
+            ]
+        )
+
+    def _hnsw_config(self) -> HnswConfigDiff:
+        """
+        HNSW index parameters from settings.
+
+        In the shared (payload) layout, graphs are built per user instead of
+        globally, so search cost follows a user's memory count, not the total.
+        """
+        if settings.MEMORY_PARTITIONING == "payload":
+            return HnswConfigDiff(
+                m=0,
+                payload_m=settings.QDRANT_HNSW_M,
+                ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+            )
+        return HnswConfigDiff(
+            m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+        )
+
+    def _quantization_config(self) -> Optional[ScalarQuantization]:
+        """Int8 scalar quantization kept in RAM, or None when disabled."""
+        if not settings.QDRANT_SCALAR_QUANTIZATION:
+            return None
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=settings.QDRANT_QUANTIZATION_QUANTILE,
+                always_ram=True,
+            )
+        )
+
+    def _search_params(self) -> SearchParams:
+        """
+        Search-time parameters from settings.
+
+        With quantization, candidates are found on the int8 vectors and the
+        oversampled top results are rescored with the original vectors.
+        """
+        quantization = None
+        if settings.QDRANT_SCALAR_QUANTIZATION:
+            quantization = QuantizationSearchParams(
+                rescore=settings.QDRANT_RESCORE,
+                oversampling=settings.QDRANT_OVERSAMPLING,
+            )
+        return SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF, quantization=quantization)
+
+    async def _is_alias(self, name: str) -> bool:
+        metrics.increment("qdrant_calls_total", operation="get_aliases")
+        aliases = (await self.client.get_aliases()).aliases
+        return any(alias.alias_name == name for alias in aliases)
+
+    async def point_alias(self, alias: str, collection_name: str) -> None:
+        """
+        Atomically create or move `alias` so it points to `collection_name`.
+
+        Raises:
+            ValueError: If `alias` is the name of a real collection
+        """
+        metrics.increment("qdrant_calls_total", operation="collection_exists")
+        if await self.client.collection_exists(alias):
+            raise ValueError(
+                f"'{alias}' is a collection, not an alias; create an alias over it "
+                "with the `alias` command and set MEMORY_COLLECTION_NAME to the alias"
+            )
+
+        operations = []
+        if await self._is_alias(alias):
+            operations.append(
+                DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias))
+            )
+        operations.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(
+                    collection_name=collection_name, alias_name=alias
+                )
+            )
+        )
+        metrics.increment("qdrant_calls_total", operation="update_collection_aliases")
+        await self.client.update_collection_aliases(
+            change_aliases_operations=operations
+        )
+        self.logger.info(f"Alias '{alias}' now points to '{collection_name}'")
+
+    async def _collection_exists(self, collection_name: str) -> bool:
+        """
+        Check if a memory collection already exists in Qdrant.
+
+        The name may also be an alias, e.g. one flipped by a migration.
+
+        Returns True if collection is present, False otherwise.
+        """
+        metrics.increment("qdrant_calls_total", operation="collection_exists")
+        if await self.client.collection_exists(collection_name):
+            return True
+
+        return await self._is_alias(collection_name)
+
+    async def _create_collection(self, collection_name: str) -> None:
+        """
+        Create a new vector collection in Qdrant for storing memories.
+
+        Uses the embedding dimension as vector size and configures cosine distance.
+        HNSW, quantization and on-disk storage follow the `QDRANT_*` settings.
+        Adds a keyword tenant index on the partition field.
+        """
+        metrics.increment("qdrant_calls_total", operation="create_collection")
+        await self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=self.dimension,
+                distance=Distance.COSINE,
+                on_disk=settings.QDRANT_ON_DISK_VECTORS,
+            ),
+            hnsw_config=self._hnsw_config(),
+            quantization_config=self._quantization_config(),
+            on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD,
+        )
+        await self._create_partition_index(collection_name)
+
+    async def _create_partition_index(self, collection_name: str) -> None:
+        """Create the keyword (tenant) payload index on the partition field."""
+        metrics.increment("qdrant_calls_total", operation="create_payload_index")
+        await self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=self.PARTITION_FIELD,
+            field_schema=KeywordIndexParams(type="keyword", is_tenant=True),
+        )
+
+    async def apply_collection_config(
+        self, collection_name: Optional[str] = None
+    ) -> None:
+        """
+        Migrate existing collections to the configured storage and index settings.
+
+        Collections created before tuning keep their original parameters, since
+        `ensure_collection` only creates missing ones. This updates them in
+        place; Qdrant re-quantizes and rebuilds the index in the background
+        while the collection keeps serving requests.
+
+        Args:
+            collection_name: Collection to update, all of them if omitted
+        """
+        names = [collection_name] if collection_name else self.collection_names()
+
+        for name in names:
+            await self.ensure_collection(name)
+            self.logger.info(f"Applying storage and index settings to '{name}'")
+            metrics.increment("qdrant_calls_total", operation="update_collection")
+            await self.client.update_collection(
+                collection_name=name,
+                vectors_config={
+                    "": VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS)
+                },
+                hnsw_config=self._hnsw_config(),
+                quantization_config=self._quantization_config(),
+                collection_params=CollectionParamsDiff(
+                    on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD
+                ),
+            )
+
+    async def ensure_collection(
+        self, collection_name: Optional[str] = None, behind_alias: bool = True
+    ) -> None:
+        """
+        Make sure a memory collection exists, creating it if needed.
+
+        A missing collection is created as `<name>_v1` with `<name>` as an
+        alias over it, so a later migration can flip the alias without
+        downtime. A real collection is never created under the served name.
+        The outcome is cached, so Qdrant is probed once per process (normally
+        at startup) instead of before every search and store.
+
+        Args:
+            collection_name: Collection to ensure, all of them if omitted
+            behind_alias: False to create a plain collection, e.g. a migration target
+        """
+        names = [collection_name] if collection_name else self.collection_names()
+
+        for name in names:
+            if name in self._ready_collections:
+                continue
+
+            async with self._collection_lock:
+                if name in self._ready_collections:
+                    continue
+                if await self._collection_exists(name):
+                    # Collections created before partitioning lack the index;
+                    # creating an index that already exists is a no-op
+                    await self._create_partition_index(name)
+                elif not behind_alias:
+                    self.logger.info(f"Creating collection '{name}'")
+                    await self._create_collection(name)
+                else:
+                    backing_name = f"{name}{self.BACKING_SUFFIX}"
+                    metrics.increment(
+                        "qdrant_calls_total", operation="collection_exists"
+                    )
+                    if not await self.client.collection_exists(backing_name):
+                        self.logger.info(f"Creating collection '{backing_name}'")
+                        await self._create_collection(backing_name)
+                    await self.point_alias(name, backing_name)
+                self._ready_collections.add(name)
+
+    async def setup(self) -> None:
+        await self.ensure_collection()
+
+    async def _call_collection(
+        self,
+        operation: str,
+        collection_name: str,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Run a Qdrant call against a memory collection.
+
+        If Qdrant reports the collection as missing (e.g. it was dropped while
+        the process was running), the cached flag is reset, the collection is
+        re-created and the call is retried once.
+
+        Args:
+            operation: Name of the operation, used to count Qdrant calls
+            collection_name: Collection the call targets
+            call: Zero-argument coroutine function performing the call
+        """
+        await self.ensure_collection(collection_name)
+        try:
+            metrics.increment("qdrant_calls_total", operation=operation)
+            return await call()
+        except UnexpectedResponse as e:
+            if e.status_code != 404:
+                raise
+            self.logger.warning(
+                f"Collection '{collection_name}' disappeared, re-creating it"
+            )
+            self._ready_collections.discard(collection_name)
+            await self.ensure_collection(collection_name)
+            metrics.increment("qdrant_calls_total", operation=operation)
+            return await call()
+
+    async def upsert_many(self, points: List[VectorPoint]) -> None:
+        # One upsert request per collection the points belong to
+        by_collection: dict[str, List[PointStruct]] = defaultdict(list)
+        for point in points:
+            by_collection[self._collection_name(point.thread_id)].append(
+                PointStruct(
+                    id=point.point_id,
+                    vector=np.asarray(point.vector).tolist(),
+                    payload={**point.payload, self.PARTITION_FIELD: point.thread_id},
+                )
+            )
+
+        for collection_name, structs in by_collection.items():
+            await self._call_collection(
+                "upsert",
+                collection_name,
+                lambda: self.client.upsert(
+                    collection_name=collection_name,
+                    points=structs,
+                ),
+            )
+
+    async def search(
+        self, thread_id: str, vector: np.ndarray, k: int
+    ) -> List[Tuple[dict, float]]:
+        collection_name = self._collection_name(thread_id)
+        results = await self._call_collection(
+            "search",
+            collection_name,
+            lambda: self.client.search(
+                collection_name=collection_name,
+                query_vector=vector.tolist(),
+                query_filter=self._thread_filter(thread_id),
+                search_params=self._search_params(),
+                limit=k,
+            ),
+        )
+        return [(hit.payload, hit.score) for hit in results]
+
+    async def list_thread_ids(self) -> List[str]:
+        thread_ids: set[str] = set()
+        for collection_name in self.collection_names():
+            offset = None
+            while True:
+                records, offset = await self._call_collection(
+                    "scroll",
+                    collection_name,
+                    lambda: self.client.scroll(
+                        collection_name=collection_name,
+                        limit=settings.MEMORY_SCROLL_PAGE_SIZE,
+                        offset=offset,
+                        with_payload=[self.PARTITION_FIELD],
+                        with_vectors=False,
+                    ),
+                )
+                thread_ids.update(
+                    record.payload[self.PARTITION_FIELD]
+                    for record in records
+                    if self.PARTITION_FIELD in record.payload
+                )
+                if offset is None:
+                    break
+        return sorted(thread_ids)
+
+    async def get_thread_points(self, thread_id: str) -> List[VectorPoint]:
+        collection_name = self._collection_name(thread_id)
+        points, offset = [], None
+        while True:
+            records, offset = await self._call_collection(
+                "scroll",
+                collection_name,
+                lambda: self.client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=self._thread_filter(thread_id),
+                    limit=settings.MEMORY_SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                ),
+            )
+            points.extend(
+                VectorPoint(
+                    thread_id=thread_id,
+                    point_id=str(record.id),
+                    vector=np.asarray(record.vector, dtype=np.float32),
+                    payload=record.payload,
+                )
+                for record in records
+            )
+            if offset is None:
+                return points
+
+    async def delete(self, thread_id: str, point_ids: List[str]) -> None:
+        if not point_ids:
+            return
+        collection_name = self._collection_name(thread_id)
+        await self._call_collection(
+            "delete",
+            collection_name,
+            lambda: self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=point_ids),
+            ),
+        )
+
+    async def close(self) -> None:
+        await self.client.close()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.settings import settings
+
+T = TypeVar("T")
+
+
+class RetrievalCache(Generic[T]):
+    """
+    Per-thread cache of memory search results, stamped with a write version.
+
+    A user's memory set only changes when something is written for them, so
+    every write bumps that thread's version and cached results are only
+    served while their version is current. Within a version, a search whose
+    query embedding is at least `similarity_threshold` cosine-similar to a
+    cached one reuses its results.
+
+    Versions are kept in process, so writes made by another process (e.g.
+    the consolidation or migration CLIs) are not seen by them; entries
+    therefore also expire `ttl_seconds` after they were cached.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = settings.RETRIEVAL_CACHE_SIMILARITY,
+        max_threads: int = settings.RETRIEVAL_CACHE_MAX_THREADS,
+        entries_per_thread: int = settings.RETRIEVAL_CACHE_ENTRIES_PER_THREAD,
+        ttl_seconds: float = settings.RETRIEVAL_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.max_threads = max_threads
+        self.entries_per_thread = entries_per_thread
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        # thread_id -> recent (version, expiry, k, unit query embedding, results)
+        self._entries: "OrderedDict[str, List[Tuple[int, float, int, np.ndarray, List[T]]]]" = OrderedDict()
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def version(self, thread_id: str) -> int:
+        """Current memory version of a thread, to be passed back to `put`."""
+        with self._lock:
+            return self._versions.get(thread_id, 0)
+
+    def bump(self, thread_id: str) -> None:
+        """Record a memory write for a thread, invalidating its cached results."""
+        with self._lock:
+            self._versions[thread_id] = self._versions.get(thread_id, 0) + 1
+            self._entries.pop(thread_id, None)
+
+    def get(self, thread_id: str, embedding: np.ndarray, k: int) -> Optional[List[T]]:
+        """
+        Look up unexpired results cached for a similar query under the current version.
+
+        Returns:
+            The cached results, or None on a miss
+        """
+        query = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(thread_id, 0)
+            for (
+                entry_version,
+                expires_at,
+                entry_k,
+                entry_query,
+                results,
+            ) in self._entries.get(thread_id, []):
+                if (
+                    entry_version == version
+                    and expires_at > now
+                    and entry_k == k
+                    and float(entry_query @ query) >= self.similarity_threshold
+                ):
+                    self._entries.move_to_end(thread_id)
+                    metrics.increment("retrieval_cache_hits_total")
+                    return results
+
+        metrics.increment("retrieval_cache_misses_total")
+        return None
+
+    def put(
+        self,
+        thread_id: str,
+        version: int,
+        embedding: np.ndarray,
+        k: int,
+        results: List[T],
+    ) -> None:
+        """
+        Cache search results for a thread.
+
+        Args:
+            version: Thread version read before searching; results are dropped
+                if a write happened in the meantime
+        """
+        query = self._unit(embedding)
+        with self._lock:
+            if self._versions.get(thread_id, 0) != version:
+                return
+
+            entries = self._entries.setdefault(thread_id, [])
+            entries.append(
+                (version, time.monotonic() + self.ttl_seconds, k, query, results)
+            )
+            del entries[: -self.entries_per_thread]
+            self._entries.move_to_end(thread_id)
+
+            # Versions are kept on eviction so in-flight stale puts stay rejected
+            while len(self._entries) > self.max_threads:
+                self._entries.popitem(last=False)
@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from zazu_bot.settings import settings
+
+
+@dataclass
+class VectorPoint:
+    """A single memory point as written to a vector backend."""
+
+    thread_id: str  # Conversation thread (user) the point belongs to
+    point_id: str  # Deterministic id of the point
+    vector: np.ndarray  # Embedding of the memory
+    payload: dict  # Memory text and metadata
+
+
+class VectorBackend(ABC):
+    """
+    Storage backend for long-term memory vectors.
+
+    Backends store one point per memory (id, vector and payload) and answer
+    nearest-neighbour queries restricted to a single user's thread. Embedding,
+    deduplication and id derivation stay in `VectorStore`, so backends only
+    deal with vectors and payloads.
+    """
+
+    PARTITION_FIELD = "thread_id"  # Payload field identifying the memory owner
+
+    @abstractmethod
+    async def setup(self) -> None:
+        """Prepare the storage (collections, files) so later calls do not have to."""
+
+    @abstractmethod
+    async def upsert_many(self, points: List[VectorPoint]) -> None:
+        """Insert or replace a batch of points, possibly of different threads."""
+
+    async def upsert(
+        self, thread_id: str, point_id: str, vector: np.ndarray, payload: dict
+    ) -> None:
+        """
+        Insert or replace a single point.
+
+        Args:
+            thread_id: Conversation thread (user) the point belongs to
+            point_id: Deterministic id of the point
+            vector: Embedding of the memory
+            payload: Memory text and metadata
+        """
+        await self.upsert_many([VectorPoint(thread_id, point_id, vector, payload)])
+
+    @abstractmethod
+    async def search(
+        self, thread_id: str, vector: np.ndarray, k: int
+    ) -> List[Tuple[dict, float]]:
+        """
+        Find the points of a thread closest to a vector.
+
+        Returns:
+            Up to k (payload, cosine similarity) pairs, most similar first
+        """
+
+    @abstractmethod
+    async def list_thread_ids(self) -> List[str]:
+        """Ids of every thread that has at least one stored point."""
+
+    @abstractmethod
+    async def get_thread_points(self, thread_id: str) -> List[VectorPoint]:
+        """Every stored point of a thread, with its vector."""
+
+    @abstractmethod
+    async def delete(self, thread_id: str, point_ids: List[str]) -> None:
+        """Delete points of a thread by id."""
+
+    async def close(self) -> None:
+        """Flush pending state and release resources."""
+
+
+def create_vector_backend(
+    dimension: int, backend: Optional[str] = None
+) -> VectorBackend:
+    """
+    Build the vector backend selected by `settings.VECTOR_BACKEND`.
+
+    Args:
+        dimension: Size of the embedding vectors
+        backend: Backend name overriding the setting ("qdrant" or "local")
+    """
+    backend = backend or settings.VECTOR_BACKEND
+
+    if backend == "qdrant":
+        from zazu_bot.modules.memory.long_term.qdrant_backend import QdrantBackend
+
+        return QdrantBackend(dimension)
+    if backend == "local":
+        from zazu_bot.modules.memory.long_term.local_backend import LocalBackend
+
+        return LocalBackend(dimension)
+
+    raise ValueError(f"Unknown vector backend: {backend}")
@@ -1,21 +1,54 @@
-import os
+import logging
+import re
+import threading
+import uuid
 from typing import Optional, List
 from functools import lru_cache
 from dataclasses import dataclass
 from datetime import datetime
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
+from zazu_bot.modules.memory.long_term.embedding_cache import EmbeddingCache
+from zazu_bot.modules.memory.long_term.embeddings import (
+    EmbeddingService,
+    load_embedding_model,
+)
+from zazu_bot.modules.memory.long_term.retrieval_cache import RetrievalCache
+from zazu_bot.modules.memory.long_term.vector_backend import (
+    VectorPoint,
+    create_vector_backend,
+)
+from zazu_bot.modules.memory.long_term.write_queue import WriteBehindQueue
 from zazu_bot.settings import settings
 
+# Namespace used to derive deterministic memory ids from their text
+MEMORY_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "zazu_bot/long_term_memory")
+
+
+def normalize_memory_text(text: str) -> str:
+    """Normalize a memory text (case and whitespace) before deriving its id."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def memory_id(text: str, thread_id: str) -> str:
+    """
+    Derive a deterministic point id from a memory text and its owner.
+
+    Unlike `hash(text)`, which is randomized per process, the uuid5 of the
+    normalized text is stable across restarts, so upserts are idempotent.
+    The thread id is part of the name so equal memories of different users
+    do not overwrite each other.
+    """
+    name = f"{thread_id}:{normalize_memory_text(text)}"
+    return str(uuid.uuid5(MEMORY_ID_NAMESPACE, name))
+
 
 @dataclass
 class Memory:
     """
     Represents a single memory entry stored in the vector database.
-    
+
     Stores the text content, associated metadata, and optional similarity score.
     Provides convenient access to memory ID and timestamp.
     """
@@ -29,6 +62,11 @@ class Memory:
         """Retrieve the unique identifier for this memory from metadata."""
         return self.metadata.get("id")
 
+    @property
+    def thread_id(self) -> Optional[str]:
+        """Retrieve the conversation thread (user) this memory belongs to."""
+        return self.metadata.get("thread_id")
+
     @property
     def timestamp(self) -> Optional[datetime]:
         """
@@ -41,163 +79,241 @@ class Memory:
 
 class VectorStore:
     """
-    Manages long-term memory storage using Qdrant vector database.
-    
-    Implements a singleton pattern to ensure a single database connection.
+    Manages long-term memory storage on top of a vector backend.
+
+    Implements a singleton pattern to ensure a single backend connection.
     Uses sentence transformers for generating text embeddings.
     Supports storing, searching, and deduplicating memories.
+
+    Storage is delegated to the backend selected by `settings.VECTOR_BACKEND`:
+    a Qdrant server, or an in-process store on memory-mapped NumPy arrays for
+    single-node deployments and tests. Either way, memories are partitioned
+    per user by their `thread_id`.
+
+    The API is fully async: embeddings are computed on a dedicated executor
+    and backends do not block the event loop.
     """
 
     # Configuration constants for vector storage
-    REQUIRED_ENV_VARS = ["QDRANT_URL", "QDRANT_API_KEY"]  # Environment variables needed
-    EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Sentence transformer model for embeddings
-    COLLECTION_NAME = "long_term_memory"  # Name of the Qdrant collection
+    EMBEDDING_MODEL = settings.EMBEDDING_MODEL  # Sentence transformer model
     SIMILARITY_THRESHOLD = 0.9  # Cosine similarity threshold for memory deduplication
 
     # Singleton pattern implementation variables
     _instance: Optional["VectorStore"] = None
     _initialized: bool = False
+    # Warm-up builds the store on the embedding executor while handlers may
+    # ask for it on the event loop, so construction must happen only once
+    _init_lock = threading.Lock()
 
     def __new__(cls) -> "VectorStore":
         """
         Ensure only one instance of VectorStore is created.
-        
+
         Returns the existing instance or creates a new one if not exists.
         """
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
+        with cls._init_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
         return cls._instance
 
     def __init__(self) -> None:
         """
         Initialize the vector store if not already initialized.
-        
-        Sets up sentence transformer model and Qdrant client.
-        Validates required environment variables.
+
+        Sets up sentence transformer model and the configured vector backend.
         """
+        with self._init_lock:
+            self._initialize()
+
+    def _initialize(self) -> None:
         if not self._initialized:
-            self._validate_env_vars()
-            self.model = SentenceTransformer(self.EMBEDDING_MODEL)
-            self.client = QdrantClient(
-                url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY
+            self.model = load_embedding_model(self.EMBEDDING_MODEL)
+            # Quantized weights give slightly different vectors, keep them apart
+            self.embedding_cache = EmbeddingCache(
+                f"{self.EMBEDDING_MODEL}:{settings.EMBEDDING_MODEL_FILE or 'default'}"
+            )
+            self.embedding_service = EmbeddingService(
+                self.model, cache=self.embedding_cache
+            )
+            self.retrieval_cache: RetrievalCache[Memory] = RetrievalCache()
+            self.backend = create_vector_backend(
+                self.model.get_sentence_embedding_dimension()
+            )
+            self.write_queue = WriteBehindQueue(
+                self.backend, on_flushed=self._on_memories_written
             )
+            self.logger = logging.getLogger(__name__)
             self._initialized = True
 
-    def _validate_env_vars(self) -> None:
+    async def _embed(self, text: str) -> np.ndarray:
         """
-        Check that all required environment variables are set.
-        
-        Raises a ValueError if any required variables are missing.
-        """
-        missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
-        if missing_vars:
-            raise ValueError(
-                f"Missing required environment variables: {', '.join(missing_vars)}"
-            )
+        Compute the embedding of a text off the event loop.
 
-    def _collection_exists(self) -> bool:
+        Requests from concurrent turns are micro-batched by the embedding
+        service into a single `encode` call on the embedding executor.
         """
-        Check if the memory collection already exists in Qdrant.
-        
-        Returns True if collection is present, False otherwise.
-        """
-        collections = self.client.get_collections().collections
-        return any(col.name == self.COLLECTION_NAME for col in collections)
+        return await self.embedding_service.embed(text)
 
-    def _create_collection(self) -> None:
-        """
-        Create a new vector collection in Qdrant for storing memories.
-        
-        Uses a sample embedding to determine vector size and configures cosine distance.
-        """
-        sample_embedding = self.model.encode("sample text")
-        self.client.create_collection(
-            collection_name=self.COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=len(sample_embedding),
-                distance=Distance.COSINE,
-            ),
-        )
+    async def ensure_collection(self) -> None:
+        """Prepare the backend storage once, normally at startup."""
+        await self.backend.setup()
+
+    async def warmup(self) -> None:
+        """Warm up the embedding model so the first user turn does not pay for it."""
+        await self.embedding_service.warmup()
+
+    async def close(self) -> None:
+        """Persist the embedding cache and flush queued writes and the backend, at shutdown."""
+        self.embedding_cache.save()
+        await self.write_queue.close()
+        await self.backend.close()
 
-    def find_similar_memory(self, text: str) -> Optional[Memory]:
+    def _on_memories_written(self, points: List[VectorPoint]) -> None:
+        """Invalidate cached retrievals of every thread that got new memories."""
+        for thread_id in {point.thread_id for point in points}:
+            self.retrieval_cache.bump(thread_id)
+
+    async def find_similar_memory(self, text: str, thread_id: str) -> Optional[Memory]:
         """
         Search for a memory similar to the given text.
-        
+
         Args:
             text: Input text to compare against existing memories
-        
+            thread_id: Conversation thread (user) the memories belong to
+
         Returns:
             Memory object if a highly similar memory exists, None otherwise
         """
-        results = self.search_memories(text, k=1)
+        embedding = await self._embed(text)
+        return await self._find_similar_by_vector(embedding, thread_id)
+
+    async def _find_similar_by_vector(
+        self, embedding: np.ndarray, thread_id: str
+    ) -> Optional[Memory]:
+        """Return the closest memory if it is above the similarity threshold."""
+        # Memories still waiting in the write queue are not in the backend yet
+        pending = self.write_queue.pending_similarity(thread_id, embedding)
+        if pending and pending[1] >= self.SIMILARITY_THRESHOLD:
+            point, score = pending
+            return Memory(
+                text=point.payload["text"],
+                metadata={k: v for k, v in point.payload.items() if k != "text"},
+                score=score,
+            )
+
+        results = await self._search_by_vector(embedding, thread_id, k=1)
         if results and results[0].score >= self.SIMILARITY_THRESHOLD:
             return results[0]
         return None
 
-    def store_memory(self, text: str, metadata: dict) -> None:
+    async def add_memory(self, text: str, thread_id: str, metadata: dict) -> bool:
         """
-        Store a new memory or update an existing similar memory.
-        
-        Checks for similar memories before storing to avoid duplicates.
-        Generates an embedding for the text and stores it in Qdrant.
-        
+        Store a memory unless a similar one already exists.
+
+        The text is embedded once and that vector is reused for both the
+        similarity check and the upsert, so a write costs one encode, one
+        search and one upsert.
+
         Args:
             text: Content of the memory
+            thread_id: Conversation thread (user) the memory belongs to
             metadata: Additional information about the memory
+
+        Returns:
+            True if the memory was stored, False if it was a duplicate
         """
-        if not self._collection_exists():
-            self._create_collection()
-
-        # Check if similar memory exists
-        similar_memory = self.find_similar_memory(text)
-        if similar_memory and similar_memory.id:
-            metadata["id"] = similar_memory.id  # Keep same ID for update
-
-        embedding = self.model.encode(text)
-        point = PointStruct(
-            id=metadata.get("id", hash(text)),
-            vector=embedding.tolist(),
-            payload={
-                "text": text,
-                **metadata,
-            },
-        )
+        embedding = await self._embed(text)
+
+        similar_memory = await self._find_similar_by_vector(embedding, thread_id)
+        if similar_memory:
+            self.logger.info(f"Similar memory already exists: '{similar_memory.text}'")
+            return False
+
+        await self.store_memory(text, thread_id, metadata, embedding=embedding)
+        return True
+
+    async def store_memory(
+        self,
+        text: str,
+        thread_id: str,
+        metadata: dict,
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Upsert a memory into the backend without checking for duplicates.
+
+        The point id is derived from the normalized text and the thread id, so
+        storing the same memory twice overwrites it instead of creating a copy.
+        With `MEMORY_WRITE_BEHIND`, the point is queued and bulk-upserted
+        later, so the caller does not wait for the write.
+
+        Args:
+            text: Content of the memory
+            thread_id: Conversation thread (user) the memory belongs to
+            metadata: Additional information about the memory
+            embedding: Precomputed embedding of the text, computed if missing
+        """
+        if embedding is None:
+            embedding = await self._embed(text)
 
-        self.client.upsert(
-            collection_name=self.COLLECTION_NAME,
-            points=[point],
+        metadata = {
+            **metadata,
+            "id": metadata.get("id") or memory_id(text, thread_id),
+            "thread_id": thread_id,
+        }
+        point = VectorPoint(
+            thread_id, metadata["id"], embedding, {"text": text, **metadata}
         )
 
-    def search_memories(self, query: str, k: int = 5) -> List[Memory]:
+        if settings.MEMORY_WRITE_BEHIND:
+            self.write_queue.put(point)
+            return
+
+        await self.backend.upsert_many([point])
+        self._on_memories_written([point])
+
+    async def search_memories(
+        self, query: str, thread_id: str, k: int = 5
+    ) -> List[Memory]:
         """
-        Search for similar memories in the vector store.
-        
+        Search for similar memories of a single user in the vector store.
+
         Generates an embedding for the query and finds similar memories.
-        
+        Results are served from the retrieval cache when a similar query was
+        answered since the user's memories last changed.
+
         Args:
             query: Text to search for similar memories
+            thread_id: Conversation thread (user) whose memories are searched
             k: Maximum number of results to return
-        
+
         Returns:
             List of Memory objects sorted by similarity
         """
-        if not self._collection_exists():
-            return []
+        query_embedding = await self._embed(query)
 
-        query_embedding = self.model.encode(query)
-        results = self.client.search(
-            collection_name=self.COLLECTION_NAME,
-            query_vector=query_embedding.tolist(),
-            limit=k,
-        )
+        cached = self.retrieval_cache.get(thread_id, query_embedding, k)
+        if cached is not None:
+            return cached
+
+        version = self.retrieval_cache.version(thread_id)
+        memories = await self._search_by_vector(query_embedding, thread_id, k)
+        self.retrieval_cache.put(thread_id, version, query_embedding, k, memories)
+        return memories
+
+    async def _search_by_vector(
+        self, embedding: np.ndarray, thread_id: str, k: int
+    ) -> List[Memory]:
+        """Search a user's memories closest to an already computed embedding."""
+        results = await self.backend.search(thread_id, embedding, k)
 
         return [
             Memory(
-                text=hit.payload["text"],
-                metadata={k: v for k, v in hit.payload.items() if k != "text"},
-                score=hit.score,
+                text=payload["text"],
+                metadata={k: v for k, v in payload.items() if k != "text"},
+                score=score,
             )
-            for hit in results
+            for payload, score in results
         ]
 
 
@@ -205,10 +321,17 @@ class VectorStore:
 def get_vector_store() -> VectorStore:
     """
     Cached function to retrieve or create the VectorStore singleton.
-    
+
     Uses lru_cache to memoize and efficiently return the same instance.
-    
+
     Returns:
         Singleton VectorStore instance
     """
-    return VectorStore()
\ No newline at end of file
+    return VectorStore()
+
+
+async def close_vector_store() -> None:
+    """Close the vector store at shutdown if it was ever created, flushing queued writes."""
+    instance = VectorStore._instance
+    if instance is not None and instance._initialized:
+        await instance.close()
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.memory.long_term.vector_backend import VectorBackend, VectorPoint
+from zazu_bot.settings import settings
+
+
+class WriteBehindQueue:
+    """
+    Buffers memory writes and upserts them to the backend in batches.
+
+    A batch is flushed once `max_batch_size` points are waiting or
+    `flush_interval` seconds after the first one was queued. Failed batches
+    are retried with exponential backoff and, if they still fail, put back
+    at the front of the queue for the next flush. `close` flushes whatever
+    is left, so writes survive a graceful shutdown.
+
+    Queued points are not searchable in the backend yet; `pending` exposes
+    them so callers can still deduplicate against them.
+    """
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        max_batch_size: int = settings.MEMORY_WRITE_BATCH_SIZE,
+        flush_interval: float = settings.MEMORY_WRITE_FLUSH_SECONDS,
+        max_retries: int = settings.MEMORY_WRITE_MAX_RETRIES,
+        on_flushed: Optional[Callable[[List[VectorPoint]], None]] = None,
+    ) -> None:
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.on_flushed = on_flushed
+        self.logger = logging.getLogger(__name__)
+
+        self._points: List[VectorPoint] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> None:
+        """Start the flushing worker on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def put(self, point: VectorPoint) -> None:
+        """Queue a point for the next batch without waiting for the write."""
+        self._ensure_worker()
+        self._points.append(point)
+        metrics.set_gauge("memory_write_queue_size", len(self._points))
+        self._wakeup.set()
+
+    def pending(self, thread_id: str) -> List[VectorPoint]:
+        """Queued points of a thread that have not been written yet."""
+        return [point for point in self._points if point.thread_id == thread_id]
+
+    def pending_similarity(
+        self, thread_id: str, embedding: np.ndarray
+    ) -> Optional[Tuple[VectorPoint, float]]:
+        """
+        Most similar queued point of a thread.
+
+        Returns:
+            (point, cosine similarity) or None if nothing is queued for the thread
+        """
+        points = self.pending(thread_id)
+        if not points:
+            return None
+
+        query = embedding / (np.linalg.norm(embedding) or 1.0)
+        vectors = np.stack([np.asarray(point.vector) for point in points])
+        scores = vectors @ query / np.maximum(np.linalg.norm(vectors, axis=1), 1e-12)
+        best = int(np.argmax(scores))
+        return points[best], float(scores[best])
+
+    async def _run(self) -> None:
+        """Worker loop flushing by size or after `flush_interval`."""
+        while True:
+            await self._wakeup.wait()
+            if len(self._points) < self.max_batch_size:
+                # Give the batch time to fill up, unless it is already full
+                await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+            if self._points:
+                # A batch failed, try again after the next interval
+                self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write every queued point, in batches of at most `max_batch_size`."""
+        async with self._flush_lock:
+            while self._points:
+                batch = self._points[: self.max_batch_size]
+                del self._points[: len(batch)]
+
+                try:
+                    written = await self._write(batch)
+                except asyncio.CancelledError:
+                    self._points[:0] = batch
+                    raise
+
+                if not written:
+                    # Keep the batch for the next flush instead of dropping it
+                    self._points[:0] = batch
+                    break
+
+            metrics.set_gauge("memory_write_queue_size", len(self._points))
+
+    async def _write(self, batch: List[VectorPoint]) -> bool:
+        """Upsert a batch, retrying with exponential backoff. Returns success."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.backend.upsert_many(batch)
+            except Exception as e:
+                metrics.increment("memory_write_failures_total")
+                self.logger.warning(
+                    f"Failed to write {len(batch)} memories "
+                    f"(attempt {attempt + 1}/{self.max_retries + 1}): {e}"
+                )
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.5 * 2**attempt)
+                continue
+
+            metrics.observe("memory_write_batch_size", len(batch))
+            if self.on_flushed:
+                self.on_flushed(batch)
+            return True
+
+        self.logger.error(f"Giving up on {len(batch)} memories until the next flush")
+        return False
+
+    async def close(self) -> None:
+        """Stop the worker and flush the remaining points."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        await self.flush()
+        if self._points:
+            self.logger.error(
+                f"Dropping {len(self._points)} unwritten memories at shutdown"
+            )
@@ -1,4 +1,5 @@
 from .speech_to_text import SpeechToText
 from .text_to_speech import TextToSpeech
+from .spoken_reply import SpokenReply
 
-__all__ = ["SpeechToText", "TextToSpeech"]
+__all__ = ["SpeechToText", "TextToSpeech", "SpokenReply"]
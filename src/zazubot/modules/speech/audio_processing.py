@@ -0,0 +1,221 @@
+import io
+import logging
+from typing import List, Optional, Tuple
+
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_leading_silence, detect_silence
+except ImportError:  # Pre-processing is optional and needs pydub (and ffmpeg)
+    AudioSegment = None
+    detect_leading_silence = None
+    detect_silence = None
+
+from zazu_bot.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# First bytes of MPEG-1/2 layer III frames, for MP3 files without an ID3 tag
+MP3_FRAME_SYNCS = (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2")
+
+
+def detect_audio_format(audio_data: bytes) -> Tuple[str, str]:
+    """
+    Detect the container of an audio payload from its magic bytes.
+
+    Args:
+        audio_data: Binary audio data
+
+    Returns:
+        (file extension, MIME type), falling back to WAV when unknown
+    """
+    if audio_data.startswith(b"OggS"):
+        return "ogg", "audio/ogg"
+    if audio_data[:4] == b"RIFF" and audio_data[8:12] == b"WAVE":
+        return "wav", "audio/wav"
+    if audio_data.startswith(b"fLaC"):
+        return "flac", "audio/flac"
+    if audio_data.startswith(b"ID3") or audio_data[:2] in MP3_FRAME_SYNCS:
+        return "mp3", "audio/mpeg"
+    if audio_data[4:8] == b"ftyp":
+        return "m4a", "audio/mp4"
+    if audio_data.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm", "audio/webm"
+    return "wav", "audio/wav"
+
+
+def is_preprocessing_available() -> bool:
+    """Whether the optional pydub dependency is installed."""
+    return AudioSegment is not None
+
+
+def load_audio(audio_data: bytes) -> "AudioSegment":
+    """Decode audio bytes with pydub, using the detected container format."""
+    extension, _ = detect_audio_format(audio_data)
+    return AudioSegment.from_file(io.BytesIO(audio_data), format=extension)
+
+
+def export_audio(segment: "AudioSegment") -> bytes:
+    """Encode audio as mono Opus in an Ogg container, compact and accepted by Whisper."""
+    buffer = io.BytesIO()
+    segment.export(buffer, format="ogg", codec="libopus", bitrate="24k")
+    return buffer.getvalue()
+
+
+def audio_duration_seconds(audio_data: bytes) -> Optional[float]:
+    """
+    Read the duration of WAV or Ogg/Opus audio from its headers, without decoding.
+
+    Ogg/Opus (WhatsApp voice notes) always counts granules at 48 kHz, so the
+    granule position of the last page gives the length. Returns None for
+    other formats or malformed headers.
+    """
+    extension, _ = detect_audio_format(audio_data)
+    if extension == "wav" and len(audio_data) > 44:
+        byte_rate = int.from_bytes(audio_data[28:32], "little")
+        return (len(audio_data) - 44) / byte_rate if byte_rate else None
+    if extension == "ogg" and b"OpusHead" in audio_data[:64]:
+        last_page = audio_data.rfind(b"OggS")
+        granule = int.from_bytes(audio_data[last_page + 6 : last_page + 14], "little")
+        return granule / 48_000 if 0 < granule < 2**63 else None
+    return None
+
+
+def _preprocess_segment(segment: "AudioSegment") -> "AudioSegment":
+    """Downmix to mono, resample and trim leading/trailing silence."""
+    segment = segment.set_channels(1).set_frame_rate(settings.STT_SAMPLE_RATE)
+
+    threshold = settings.STT_SILENCE_THRESHOLD_DBFS
+    start = detect_leading_silence(segment, silence_threshold=threshold)
+    end = len(segment) - detect_leading_silence(
+        segment.reverse(), silence_threshold=threshold
+    )
+    return segment[start:end] if end > start else segment
+
+
+def preprocess_audio(audio_data: bytes) -> bytes:
+    """
+    Downmix to mono, resample and trim leading/trailing silence.
+
+    Whisper works on 16 kHz mono internally, so this only drops bytes the
+    model would discard anyway. The processed audio is returned only when it
+    is smaller than the original; without pydub the input is returned as is.
+
+    Args:
+        audio_data: Binary audio data in any container ffmpeg can decode
+
+    Returns:
+        The processed (or original) audio bytes
+    """
+    audio_data, _ = prepare_audio(audio_data, preprocess=True, split=False)
+    return audio_data
+
+
+def _find_cut(
+    segment: "AudioSegment", target_ms: int, search_ms: int
+) -> Tuple[int, bool]:
+    """
+    Position near `target_ms` to cut at, in the middle of the last silence.
+
+    Only the `search_ms` before the target are searched; without a silence
+    there the audio is cut at the target.
+
+    Returns:
+        (cut position, whether it falls in a silence)
+    """
+    window_start = max(0, target_ms - search_ms)
+    silences = detect_silence(
+        segment[window_start:target_ms],
+        min_silence_len=settings.STT_CHUNK_MIN_SILENCE_MS,
+        silence_thresh=settings.STT_SILENCE_THRESHOLD_DBFS,
+    )
+    if not silences:
+        return target_ms, False
+    silence_start, silence_end = silences[-1]
+    return window_start + (silence_start + silence_end) // 2, True
+
+
+def _split_segment(segment: "AudioSegment") -> Optional[List[bytes]]:
+    """Split decoded audio into chunks, or return None if it is short enough."""
+    if len(segment) <= settings.STT_CHUNKING_MIN_SECONDS * 1000:
+        return None
+
+    chunk_ms = int(settings.STT_CHUNK_SECONDS * 1000)
+    overlap_ms = int(settings.STT_CHUNK_OVERLAP_SECONDS * 1000)
+    search_ms = chunk_ms // 4
+
+    chunks, start = [], 0
+    while start < len(segment):
+        if len(segment) - start <= chunk_ms + search_ms:
+            chunks.append(segment[start:])
+            break
+        cut, in_silence = _find_cut(segment, start + chunk_ms, search_ms)
+        chunks.append(segment[start:cut])
+        # A cut in a pause splits no word; only forced cuts need an overlap
+        start = cut if in_silence else max(cut - overlap_ms, start + 1)
+
+    return [export_audio(chunk.set_channels(1)) for chunk in chunks]
+
+
+def split_audio(audio_data: bytes) -> Optional[List[bytes]]:
+    """
+    Split long audio into chunks cut on silences.
+
+    Chunks are about `STT_CHUNK_SECONDS` long, each cut in a pause found
+    within the last few seconds before the target length. When no pause is
+    found the audio is cut at the target length and the next chunk starts
+    `STT_CHUNK_OVERLAP_SECONDS` earlier, so the word cut in two is heard in
+    full by one of the two requests.
+
+    Args:
+        audio_data: Binary audio data
+
+    Returns:
+        Encoded chunks, or None if the audio is short enough for a single
+        request or pydub is not installed
+    """
+    _, chunks = prepare_audio(audio_data, preprocess=False)
+    return chunks
+
+
+def prepare_audio(
+    audio_data: bytes, preprocess: bool, split: bool = True
+) -> Tuple[bytes, Optional[List[bytes]]]:
+    """
+    Pre-process and split audio for transcription, decoding it at most once.
+
+    Without pre-processing, audio whose header shows it is too short to be
+    chunked (see `audio_duration_seconds`) is not decoded at all.
+
+    Args:
+        audio_data: Binary audio data
+        preprocess: Whether to downmix, resample and trim silence
+        split: Whether to split long audio into chunks (see `split_audio`)
+
+    Returns:
+        (audio to upload as a single request, chunks or None); without pydub
+        or when decoding fails, the original audio and None
+    """
+    if not is_preprocessing_available() or not (preprocess or split):
+        return audio_data, None
+
+    if not preprocess:
+        duration = audio_duration_seconds(audio_data)
+        if duration is not None and duration <= settings.STT_CHUNKING_MIN_SECONDS:
+            return audio_data, None
+
+    try:
+        segment = load_audio(audio_data)
+    except Exception as e:
+        logger.warning(f"Could not decode audio, uploading the original: {e}")
+        return audio_data, None
+
+    if preprocess:
+        try:
+            segment = _preprocess_segment(segment)
+            processed = export_audio(segment)
+            if len(processed) < len(audio_data):
+                audio_data = processed
+        except Exception as e:
+            logger.warning(f"Audio pre-processing failed, uploading the original: {e}")
+
+    return audio_data, _split_segment(segment) if split else None
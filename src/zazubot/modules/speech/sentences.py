@@ -0,0 +1,73 @@
+import re
+from typing import List, Tuple
+
+# End of a sentence: terminal punctuation, optional closing quotes/brackets and
+# whitespace, or a line break
+SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\s*\n\s*")
+
+# Softer places to break a sentence that is too long on its own
+CLAUSE_END = re.compile(r"(?<=[,;:—])\s+")
+
+
+def split_complete_sentences(text: str) -> Tuple[List[str], str]:
+    """
+    Split streamed text into the sentences completed so far and the rest.
+
+    A sentence only counts as complete once the whitespace after its
+    punctuation has arrived, so "3." in "3.5" is not taken as an end.
+
+    Returns:
+        (complete sentences, trailing text that may still grow)
+    """
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        sentence = text[start : match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    return sentences, text[start:]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a complete text into sentences."""
+    sentences, rest = split_complete_sentences(text)
+    if rest.strip():
+        sentences.append(rest.strip())
+    return sentences
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Break a sentence longer than `max_chars` at clause ends, then at spaces."""
+    parts: List[str] = []
+    for clause in CLAUSE_END.split(sentence):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            parts.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        parts.append(clause)
+    return [part for part in parts if part]
+
+
+def segment_text(text: str, max_chars: int) -> List[str]:
+    """
+    Group the sentences of a text into segments of at most `max_chars`.
+
+    The first sentence is always its own segment so that the first audio
+    is ready as early as possible; later sentences are packed together.
+    """
+    pieces: List[str] = []
+    for sentence in split_sentences(text):
+        pieces.extend(
+            _split_long(sentence, max_chars)
+            if len(sentence) > max_chars
+            else [sentence]
+        )
+
+    segments: List[str] = []
+    for piece in pieces:
+        if len(segments) > 1 and len(segments[-1]) + 1 + len(piece) <= max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return segments
@@ -1,13 +1,55 @@
+import asyncio
 import os
-import tempfile
-from typing import Optional
+import re
+from typing import List, Optional
 
-from groq import Groq
+from groq import AsyncGroq
 
+from zazu_bot.core.deadline import Deadline
+from zazu_bot.core.executors import run_in_media_executor
 from zazu_bot.core.exceptions import SpeechToTextError
+from zazu_bot.modules.speech.audio_processing import (
+    detect_audio_format,
+    prepare_audio,
+)
 from zazu_bot.settings import settings
 
 
+def _words(text: str) -> List[str]:
+    """Lowercase words of a text without punctuation, for overlap matching."""
+    return [re.sub(r"[^\w']", "", word).lower() for word in text.split()]
+
+
+def stitch_transcripts(
+    transcripts: List[str], max_overlap_words: int = 20, min_overlap_words: int = 2
+) -> str:
+    """
+    Join transcripts of overlapping chunks, dropping words heard twice.
+
+    For each pair of consecutive chunks, the longest run of words ending the
+    first one and starting the next one (between `min_overlap_words` and
+    `max_overlap_words`, ignoring case and punctuation) is removed from the
+    start of the next one. Single-word matches are kept, as a repeated "the"
+    or "I" is more likely speech than overlap.
+    """
+    stitched: List[str] = []
+    for transcript in transcripts:
+        words = transcript.split()
+        if stitched and words:
+            previous = _words(" ".join(stitched[-max_overlap_words:]))
+            current = _words(transcript)
+            for size in range(
+                min(len(previous), len(current), max_overlap_words),
+                min_overlap_words - 1,
+                -1,
+            ):
+                if previous[-size:] == current[:size]:
+                    words = words[size:]
+                    break
+        stitched.extend(words)
+    return " ".join(stitched)
+
+
 class SpeechToText:
     """A class to handle speech-to-text conversion using Groq's Whisper model."""
 
@@ -17,7 +59,7 @@ class SpeechToText:
     def __init__(self):
         """Initialize the SpeechToText class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[Groq] = None
+        self._client: Optional[AsyncGroq] = None
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -28,17 +70,53 @@ class SpeechToText:
             )
 
     @property
-    def client(self) -> Groq:
+    def client(self) -> AsyncGroq:
         """Get or create Groq client instance using singleton pattern."""
         if self._client is None:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            self._client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         return self._client
 
-    async def transcribe(self, audio_data: bytes) -> str:
+    async def _transcribe_bytes(self, audio_data: bytes, deadline: Deadline) -> str:
+        """Upload audio bytes from memory and return the raw transcription."""
+        extension, mime_type = detect_audio_format(audio_data)
+        optional_args = {}
+        if settings.STT_LANGUAGE:
+            optional_args["language"] = settings.STT_LANGUAGE
+        if deadline.is_bounded:
+            optional_args["timeout"] = deadline.timeout()
+
+        return await self.client.audio.transcriptions.create(
+            file=(f"audio.{extension}", audio_data, mime_type),
+            model=settings.STT_MODEL_NAME,
+            response_format="text",
+            **optional_args,
+        )
+
+    async def _transcribe_chunks(self, chunks: List[bytes], deadline: Deadline) -> str:
+        """Transcribe chunks concurrently, at most `STT_MAX_CONCURRENCY` at a time."""
+        semaphore = asyncio.Semaphore(settings.STT_MAX_CONCURRENCY)
+
+        async def transcribe_chunk(chunk: bytes) -> str:
+            async with semaphore:
+                return (await self._transcribe_bytes(chunk, deadline)).strip()
+
+        transcripts = await asyncio.gather(*(transcribe_chunk(c) for c in chunks))
+        return stitch_transcripts(list(transcripts))
+
+    async def transcribe(
+        self, audio_data: bytes, deadline: Optional[Deadline] = None
+    ) -> str:
         """Convert speech to text using Groq's Whisper model.
 
+        The audio is uploaded from memory, named after the container detected
+        from its magic bytes (WhatsApp sends Ogg/Opus), and optionally
+        pre-processed first (see `STT_PREPROCESS`). Long audio is split on
+        silences and its chunks are transcribed concurrently; the audio is
+        decoded at most once for both.
+
         Args:
             audio_data: Binary audio data
+            deadline: Optional request deadline bounding the API call
 
         Returns:
             str: Transcribed text
@@ -50,30 +128,22 @@ class SpeechToText:
         if not audio_data:
             raise ValueError("Audio data cannot be empty")
 
+        deadline = deadline or Deadline.unbounded()
+
         try:
-            # Create a temporary file with .wav extension
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-
-            try:
-                # Open the temporary file for the API request
-                with open(temp_file_path, "rb") as audio_file:
-                    transcription = self.client.audio.transcriptions.create(
-                        file=audio_file,
-                        model="whisper-large-v3-turbo",
-                        language="en",
-                        response_format="text",
-                    )
-
-                if not transcription:
-                    raise SpeechToTextError("Transcription result is empty")
-
-                return transcription
-
-            finally:
-                # Clean up the temporary file
-                os.unlink(temp_file_path)
+            deadline.check("transcription")
+
+            audio_data, chunks = await run_in_media_executor(
+                prepare_audio, audio_data, settings.STT_PREPROCESS
+            )
+            if chunks:
+                transcription = await self._transcribe_chunks(chunks, deadline)
+            else:
+                transcription = await self._transcribe_bytes(audio_data, deadline)
+            if not transcription:
+                raise SpeechToTextError("Transcription result is empty")
+
+            return transcription
 
         except Exception as e:
             raise SpeechToTextError(
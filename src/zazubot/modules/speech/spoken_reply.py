@@ -0,0 +1,67 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from zazu_bot.core.deadline import Deadline
+from zazu_bot.modules.speech.text_to_speech import TextToSpeech
+
+
+class SpokenReply:
+    """
+    Speak a reply sentence by sentence while it is still being generated.
+
+    The text pieces (complete sentences, e.g. from `AsteriskRemovalParser`
+    when streamed) are consumed in their own task, so generation never waits
+    for speech synthesis and a synthesis failure does not interrupt the text.
+    Each piece is queued for synthesis as soon as it arrives, so the first
+    audio only waits for the first sentence.
+    """
+
+    def __init__(
+        self,
+        pieces: AsyncIterable[str],
+        text_to_speech: TextToSpeech,
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        self.text_to_speech = text_to_speech
+        self.deadline = deadline
+        self._pieces = pieces
+        self._parts: List[str] = []
+        self._sentences: asyncio.Queue = asyncio.Queue()
+        self._generation: Optional[asyncio.Task] = None
+
+    def _start(self) -> None:
+        if self._generation is None:
+            self._generation = asyncio.create_task(self._generate())
+
+    async def _generate(self) -> str:
+        """Collect the reply and hand each piece over to synthesis."""
+        try:
+            async for piece in self._pieces:
+                self._parts.append(piece)
+                if piece.strip():
+                    self._sentences.put_nowait(piece)
+        finally:
+            self._sentences.put_nowait(None)
+        return "".join(self._parts).strip()
+
+    async def _queued_sentences(self) -> AsyncIterator[str]:
+        while (sentence := await self._sentences.get()) is not None:
+            yield sentence
+
+    async def audio_segments(self) -> AsyncIterator[bytes]:
+        """
+        Yield the audio of the reply, one complete segment at a time and in order.
+
+        Raises:
+            TextToSpeechError: If the text-to-speech conversion fails
+        """
+        self._start()
+        async for segment_audio in self.text_to_speech.stream_sentences(
+            self._queued_sentences(), self.deadline
+        ):
+            yield segment_audio
+
+    async def text(self) -> str:
+        """Wait for the whole reply and return its text."""
+        self._start()
+        return await self._generation
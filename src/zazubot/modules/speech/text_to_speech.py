@@ -1,10 +1,20 @@
+import asyncio
+import math
 import os
-from elevenlabs import ElevenLabs, Voice, VoiceSettings
-from typing import Optional
+import time
+from elevenlabs import AsyncElevenLabs, Voice, VoiceSettings
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
 
+from zazu_bot.core.circuit_breaker import ELEVENLABS, get_circuit_breaker
+from zazu_bot.core.deadline import Deadline
 from zazu_bot.core.exceptions import TextToSpeechError
+from zazu_bot.core.metrics import metrics
+from zazu_bot.modules.speech.sentences import segment_text
 from zazu_bot.settings import settings
 
+# Marks the end of a segment's audio in its chunk queue
+_END = object()
+
 
 class TextToSpeech:
     """A class to handle text-to-speech conversion using ElevenLabs."""
@@ -12,10 +22,16 @@ class TextToSpeech:
     # Required environment variables
     REQUIRED_ENV_VARS = ["ELEVENLABS_API_KEY", "ELEVENLABS_VOICE_ID"]
 
-    def __init__(self):
+    def __init__(
+        self,
+        segment_max_chars: int = settings.TTS_SEGMENT_MAX_CHARS,
+        max_concurrency: int = settings.TTS_MAX_CONCURRENCY,
+    ):
         """Initialize the TextToSpeech class and validate environment variables."""
         self._validate_env_vars()
-        self._client: Optional[ElevenLabs] = None
+        self._client: Optional[AsyncElevenLabs] = None
+        self.segment_max_chars = segment_max_chars
+        self.max_concurrency = max_concurrency
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
@@ -26,49 +42,223 @@ class TextToSpeech:
             )
 
     @property
-    def client(self) -> ElevenLabs:
+    def client(self) -> AsyncElevenLabs:
         """Get or create ElevenLabs client instance using singleton pattern."""
         if self._client is None:
-            self._client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+            self._client = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
         return self._client
 
-    async def synthesize(self, text: str) -> bytes:
-        """Convert text to speech using ElevenLabs.
+    def _generation_kwargs(self, text: str, deadline: Deadline) -> dict:
+        """Build the arguments of a streamed generation request."""
+        request_options = None
+        if deadline.is_bounded:
+            request_options = {
+                "timeout_in_seconds": max(1, math.ceil(deadline.remaining()))
+            }
+        return dict(
+            text=text,
+            voice=Voice(
+                voice_id=settings.ELEVENLABS_VOICE_ID,
+                settings=VoiceSettings(stability=0.5, similarity_boost=0.5),
+            ),
+            model=settings.TTS_MODEL_NAME,
+            stream=True,
+            request_options=request_options,
+        )
+
+    async def _generate(self, text: str, deadline: Deadline) -> AsyncIterator[bytes]:
+        """Run a streamed generation request and yield audio chunks as they arrive."""
+        audio_stream = await self.client.generate(
+            **self._generation_kwargs(text, deadline)
+        )
+        async for chunk in audio_stream:
+            if chunk:
+                yield chunk
+
+    async def _synthesize_segment(
+        self,
+        text: str,
+        deadline: Deadline,
+        chunks: asyncio.Queue,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Synthesize one segment into its queue, ending with `_END` or an error."""
+        async with semaphore:
+            try:
+                deadline.check("speech synthesis")
+                with get_circuit_breaker(ELEVENLABS).protect(deadline):
+                    received = False
+                    async for chunk in self._generate(text, deadline):
+                        received = True
+                        chunks.put_nowait(chunk)
+                    if not received:
+                        raise TextToSpeechError("Generated audio is empty")
+            except Exception as e:
+                error = TextToSpeechError(f"Text-to-speech conversion failed: {str(e)}")
+                error.__cause__ = e
+                chunks.put_nowait(error)
+            chunks.put_nowait(_END)
+
+    async def _stream(
+        self, texts: AsyncIterable[str], deadline: Optional[Deadline]
+    ) -> AsyncIterator[Tuple[int, bytes]]:
+        """
+        Synthesize the segments of incoming texts concurrently and yield their chunks in order.
+
+        Each text is split into segments as soon as it arrives and every
+        segment is requested right away (at most `max_concurrency` at a time)
+        and buffered in its own queue; the chunks of the segment being played
+        are yielded as they arrive, later ones once it is complete.
+
+        Yields:
+            (segment index, audio chunk)
+        """
+        deadline = deadline or Deadline.unbounded()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        segment_queues: asyncio.Queue = asyncio.Queue()
+        tasks = []
+
+        async def schedule() -> None:
+            try:
+                async for text in texts:
+                    for segment in segment_text(text, self.segment_max_chars):
+                        chunks: asyncio.Queue = asyncio.Queue()
+                        tasks.append(
+                            asyncio.create_task(
+                                self._synthesize_segment(
+                                    segment, deadline, chunks, semaphore
+                                )
+                            )
+                        )
+                        segment_queues.put_nowait(chunks)
+            finally:
+                segment_queues.put_nowait(_END)
+
+        scheduler = asyncio.create_task(schedule())
+        start, index = time.perf_counter(), 0
+        try:
+            while (chunks := await segment_queues.get()) is not _END:
+                while (item := await chunks.get()) is not _END:
+                    if isinstance(item, Exception):
+                        raise item
+                    if start is not None:
+                        metrics.observe(
+                            "tts_time_to_first_audio_seconds",
+                            time.perf_counter() - start,
+                        )
+                        start = None
+                    yield index, item
+                index += 1
+            await scheduler  # Surface errors raised by the source of the texts
+            metrics.observe("tts_segments_per_reply", index)
+        finally:
+            # The caller may stop early, do not keep synthesizing for nobody
+            scheduler.cancel()
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _group_segments(
+        chunks: AsyncIterator[Tuple[int, bytes]],
+    ) -> AsyncIterator[bytes]:
+        """Join the chunks of each segment and yield complete segments in order."""
+        current, audio = 0, []
+        async for index, chunk in chunks:
+            if index != current:
+                yield b"".join(audio)
+                current, audio = index, []
+            audio.append(chunk)
+        if audio:
+            yield b"".join(audio)
+
+    @staticmethod
+    def _validated(text: str) -> AsyncIterator[str]:
+        """Check a complete text and turn it into a single-item stream of texts."""
+        if not text.strip():
+            raise ValueError("Input text cannot be empty")
+
+        async def single() -> AsyncIterator[str]:
+            yield text
+
+        return single()
+
+    async def stream(
+        self, text: str, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[bytes]:
+        """Convert text to speech, yielding audio chunks as soon as they are available.
+
+        Long texts are split at sentence boundaries and the segments are
+        synthesized concurrently; the chunks are still yielded in text order,
+        so they can be concatenated or played back as they come.
 
         Args:
             text: Text to convert to speech
+            deadline: Optional request deadline bounding the API calls
 
-        Returns:
-            bytes: Audio data
+        Yields:
+            bytes: Consecutive pieces of the MP3 audio
 
         Raises:
-            ValueError: If the input text is empty or too long
+            ValueError: If the input text is empty
             TextToSpeechError: If the text-to-speech conversion fails
         """
-        if not text.strip():
-            raise ValueError("Input text cannot be empty")
+        async for _, chunk in self._stream(self._validated(text), deadline):
+            yield chunk
 
-        if len(text) > 5000:  # ElevenLabs typical limit
-            raise ValueError("Input text exceeds maximum length of 5000 characters")
+    async def stream_segments(
+        self, text: str, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[bytes]:
+        """Convert text to speech, yielding the complete audio of each segment in order.
 
-        try:
-            audio_generator = self.client.generate(
-                text=text,
-                voice=Voice(
-                    voice_id=settings.ELEVENLABS_VOICE_ID,
-                    settings=VoiceSettings(stability=0.5, similarity_boost=0.5),
-                ),
-                model=settings.TTS_MODEL_NAME,
-            )
+        For players that cannot consume a byte stream but can queue clips: the
+        first segment is a single sentence, so it is ready quickly.
+
+        Raises:
+            ValueError: If the input text is empty
+            TextToSpeechError: If the text-to-speech conversion fails
+        """
+        chunks = self._stream(self._validated(text), deadline)
+        async for segment_audio in self._group_segments(chunks):
+            yield segment_audio
+
+    async def stream_sentences(
+        self, sentences: AsyncIterable[str], deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[bytes]:
+        """Convert text that is still being written to speech, one segment at a time.
+
+        Each sentence is sent to synthesis as soon as it arrives, so the first
+        audio only waits for the first sentence instead of the whole text.
+        Blank sentences are skipped.
+
+        Args:
+            sentences: Complete sentences, in order, e.g. from a streamed LLM reply
+            deadline: Optional request deadline bounding the API calls
+
+        Yields:
+            bytes: The complete audio of each segment, in order
+
+        Raises:
+            TextToSpeechError: If the text-to-speech conversion fails
+        """
+        chunks = self._stream(sentences, deadline)
+        async for segment_audio in self._group_segments(chunks):
+            yield segment_audio
+
+    async def synthesize(self, text: str, deadline: Optional[Deadline] = None) -> bytes:
+        """Convert text to speech using ElevenLabs.
+
+        Texts of any length are accepted: they are synthesized in concurrent
+        sentence-aligned segments whose MP3 streams are joined in order.
 
-            # Convert generator to bytes
-            audio_bytes = b"".join(audio_generator)
-            if not audio_bytes:
-                raise TextToSpeechError("Generated audio is empty")
+        Args:
+            text: Text to convert to speech
+            deadline: Optional request deadline bounding the API calls
 
-            return audio_bytes
+        Returns:
+            bytes: Audio data
 
-        except Exception as e:
-            raise TextToSpeechError(
-                f"Text-to-speech conversion failed: {str(e)}"
-            ) from e
+        Raises:
+            ValueError: If the input text is empty
+            TextToSpeechError: If the text-to-speech conversion fails
+        """
+        return b"".join([chunk async for chunk in self.stream(text, deadline)])
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import aiosqlite
+
+from zazu_bot.core.metrics import metrics
+from zazu_bot.settings import settings
+
+
+class TranscriptionCache:
+    """
+    Cache of transcripts keyed by a hash of the audio content.
+
+    Forwarded voice notes and webhook retries carry the same bytes, so their
+    transcript can be reused instead of uploading the audio again. The key
+    also covers the STT model and language, which change the transcript.
+
+    Recent entries are kept in an in-memory LRU in front of a SQLite table
+    that survives restarts, read and written through one long-lived
+    connection. Entries expire after `ttl` seconds; every `EVICTION_INTERVAL`
+    writes, expired entries are deleted and, if the table holds more than
+    `max_entries`, the least recently used ones beyond that.
+    """
+
+    # Writes between two eviction passes
+    EVICTION_INTERVAL = 100
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.STT_CACHE_DB_PATH,
+        ttl: float = settings.STT_CACHE_TTL_SECONDS,
+        max_entries: int = settings.STT_CACHE_MAX_ENTRIES,
+        memory_entries: int = settings.STT_CACHE_MEMORY_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        # Evict on the first write, in case the table outgrew a lower limit
+        self._writes_since_eviction = self.EVICTION_INTERVAL
+
+    @staticmethod
+    def key(audio_data: bytes) -> str:
+        """Content hash of the audio, salted with the settings affecting the transcript."""
+        digest = hashlib.sha256(audio_data)
+        digest.update(f"\0{settings.STT_MODEL_NAME}\0{settings.STT_LANGUAGE}".encode())
+        return digest.hexdigest()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        """Open the SQLite connection and create the table on first use."""
+        if self._db is not None:
+            return self._db
+        async with self._db_lock:
+            if self._db is not None:
+                return self._db
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = await aiosqlite.connect(self.path)
+            try:
+                await db.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS transcriptions (
+                        key TEXT PRIMARY KEY,
+                        transcript TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                    """
+                )
+                await db.execute(
+                    "CREATE INDEX IF NOT EXISTS transcriptions_accessed_at "
+                    "ON transcriptions (accessed_at)"
+                )
+                await db.commit()
+            except Exception:
+                await db.close()
+                raise
+            self._db = db
+            return db
+
+    async def close(self) -> None:
+        """Close the SQLite connection, if it was opened."""
+        async with self._db_lock:
+            if self._db is not None:
+                await self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, transcript: str, created_at: float) -> None:
+        self._memory[key] = (transcript, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, audio_data: bytes) -> Optional[str]:
+        """
+        Look up the transcript of an audio payload.
+
+        Returns:
+            The cached transcript, or None on a miss or if it expired
+        """
+        key = self.key(audio_data)
+        now = time.time()
+
+        cached = self._memory.get(key)
+        if cached and now - cached[1] < self.ttl:
+            self._memory.move_to_end(key)
+            metrics.increment("transcription_cache_hits_total", tier="memory")
+            return cached[0]
+
+        if self.path:
+            try:
+                db = await self._connection()
+                async with db.execute(
+                    "SELECT transcript, created_at FROM transcriptions "
+                    "WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl),
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row:
+                    await db.execute(
+                        "UPDATE transcriptions SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    await db.commit()
+            except Exception as e:
+                self.logger.warning(f"Transcription cache lookup failed: {e}")
+                row = None
+
+            if row:
+                self._remember(key, row[0], row[1])
+                metrics.increment("transcription_cache_hits_total", tier="sqlite")
+                return row[0]
+
+        metrics.increment("transcription_cache_misses_total")
+        return None
+
+    async def _evict(self, db: aiosqlite.Connection, now: float) -> None:
+        """Delete expired entries, then the least recently used beyond `max_entries`."""
+        await db.execute(
+            "DELETE FROM transcriptions WHERE created_at <= ?", (now - self.ttl,)
+        )
+        async with db.execute("SELECT COUNT(*) FROM transcriptions") as cursor:
+            (count,) = await cursor.fetchone()
+        if count > self.max_entries:
+            await db.execute(
+                "DELETE FROM transcriptions WHERE accessed_at < ("
+                "SELECT accessed_at FROM transcriptions "
+                "ORDER BY accessed_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries - 1,),
+            )
+
+    async def put(self, audio_data: bytes, transcript: str) -> None:
+        """Store a transcript, periodically evicting expired and least recently used entries."""
+        key = self.key(audio_data)
+        now = time.time()
+        self._remember(key, transcript, now)
+
+        if not self.path:
+            return
+
+        try:
+            db = await self._connection()
+            await db.execute(
+                "INSERT OR REPLACE INTO transcriptions VALUES (?, ?, ?, ?)",
+                (key, transcript, now, now),
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= self.EVICTION_INTERVAL:
+                self._writes_since_eviction = 0
+                await self._evict(db, now)
+            await db.commit()
+        except Exception as e:
+            self.logger.warning(f"Failed to store transcription in cache: {e}")
+
+
+@lru_cache
+def get_transcription_cache() -> TranscriptionCache:
+    """Shared transcription cache of the process."""
+    return TranscriptionCache()
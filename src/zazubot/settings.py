@@ -1,11 +1,13 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """
     Application configuration management using Pydantic Settings.
-    
-    Loads environment variables from .env file, with support for 
+
+    Loads environment variables from .env file, with support for
     API keys, model names, and memory management settings.
     """
 
@@ -13,7 +15,7 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",  # Specify .env file location
         extra="ignore",  # Ignore undefined environment variables
-        env_file_encoding="utf-8"  # Use UTF-8 encoding for .env file
+        env_file_encoding="utf-8",  # Use UTF-8 encoding for .env file
     )
 
     # API Keys for various services
@@ -23,8 +25,8 @@ class Settings(BaseSettings):
     TOGETHER_API_KEY: str  # API key for Together AI services
 
     # Qdrant vector database configuration
-    QDRANT_API_KEY: str | None  # Optional API key for Qdrant
-    QDRANT_URL: str  # Base URL for Qdrant service
+    QDRANT_API_KEY: str | None = None  # Optional API key for Qdrant
+    QDRANT_URL: str | None = None  # Qdrant service URL, required by the qdrant backend
     QDRANT_PORT: str = "6333"  # Default Qdrant port
     QDRANT_HOST: str | None = None  # Optional host specification
 
@@ -32,19 +34,122 @@ class Settings(BaseSettings):
     TEXT_MODEL_NAME: str = "llama-3.3-70b-versatile"  # Primary text generation model
     SMALL_TEXT_MODEL_NAME: str = "gemma2-9b-it"  # Smaller text model
     STT_MODEL_NAME: str = "whisper-large-v3-turbo"  # Speech-to-text model
+    STT_LANGUAGE: str | None = "en"  # Transcription language, auto-detected if None
     TTS_MODEL_NAME: str = "eleven_flash_v2_5"  # Text-to-speech model
     TTI_MODEL_NAME: str = "black-forest-labs/FLUX.1-schnell-Free"  # Text-to-image model
     ITT_MODEL_NAME: str = "llama-3.2-90b-vision-preview"  # Image-to-text model
 
     # Memory and conversation management settings
     MEMORY_TOP_K: int = 3  # Number of top memories to retrieve
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # Sentence transformer of memories
+    MEMORY_COLLECTION_NAME: str = "long_term_memory"  # Collection/alias (shard prefix)
+    # Vector database: a Qdrant server or an in-process memmap store ("local")
+    VECTOR_BACKEND: Literal["qdrant", "local"] = "qdrant"
+    LOCAL_VECTOR_STORE_PATH: str = "/app/data/long_term_memory"  # Local backend dir
+    LOCAL_VECTOR_FLUSH_ROWS: int = 256  # Pending points triggering a flush
+    LOCAL_VECTOR_FLUSH_SECONDS: float = 5.0  # Longest time a write stays in memory
+    # Tenants share one collection ("payload") or are hashed into shard collections
+    MEMORY_PARTITIONING: Literal["payload", "collection"] = "payload"
+    MEMORY_COLLECTION_SHARDS: int = 8  # Collections of the "collection" layout
+
+    QDRANT_SCALAR_QUANTIZATION: bool = True  # Keep int8 quantized vectors in RAM
+    QDRANT_QUANTIZATION_QUANTILE: float = 0.99  # Quantile clipping outliers to quantize
+    QDRANT_RESCORE: bool = True  # Rescore quantized candidates with original vectors
+    QDRANT_OVERSAMPLING: float = 2.0  # Candidates fetched per result before rescoring
+    QDRANT_HNSW_M: int = 16  # HNSW edges per node (per tenant with the payload layout)
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100  # HNSW build-time neighbour candidates
+    QDRANT_HNSW_EF: int = 64  # HNSW search-time neighbour candidates
+    QDRANT_ON_DISK_VECTORS: bool = True  # Keep original vectors on disk (memmap)
+    QDRANT_ON_DISK_PAYLOAD: bool = True  # Keep payloads on disk
     ROUTER_MESSAGES_TO_ANALYZE: int = 3  # Messages to analyze for routing
     TOTAL_MESSAGES_SUMMARY_TRIGGER: int = 20  # Trigger point for conversation summary
     TOTAL_MESSAGES_AFTER_SUMMARY: int = 5  # Messages to keep after summary
 
+    # Circuit breaker settings for external providers (Together, ElevenLabs, Groq vision)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 3  # Consecutive failures before opening
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = 30.0  # Seconds before a probe is allowed
+
+    # Maximum threads used for blocking media processing such as audio decoding
+    MEDIA_THREAD_POOL_SIZE: int = 8
+
+    # Threads dedicated to computing embeddings off the event loop
+    EMBEDDING_THREAD_POOL_SIZE: int = 1
+
+    # Threads for blocking local storage I/O, e.g. flushing the local vector store
+    STORAGE_THREAD_POOL_SIZE: int = 1
+
+    # Micro-batching of embedding requests coming from concurrent turns
+    EMBEDDING_MAX_BATCH_SIZE: int = 32  # Maximum texts encoded in one call
+    EMBEDDING_MAX_WAIT_MS: float = 5.0  # Maximum time a request waits for a batch
+
+    # LRU cache of computed embeddings
+    EMBEDDING_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Size budget of cached vectors
+    EMBEDDING_CACHE_PATH: str | None = None  # File persisting the cache across restarts
+
+    # Offline maintenance of long-term memories
+    MEMORY_SCROLL_PAGE_SIZE: int = 256  # Points fetched per scroll request
+    MEMORY_CONSOLIDATION_SIMILARITY: float = 0.9  # Similarity of redundant memories
+    MEMORY_MAX_AGE_DAYS: int | None = None  # Older memories expire (never if None)
+
+    # Memory analysis off the critical path, batched across turns and users
+    MEMORY_EXTRACTION_IN_BACKGROUND: bool = True  # Turns do not wait for extraction
+    MEMORY_ANALYSIS_BATCH_SIZE: int = 16  # Messages analyzed per LLM call
+    MEMORY_ANALYSIS_MAX_WAIT_SECONDS: float = 2.0  # Longest wait for a batch
+
+    # Local filter skipping the memory-analysis LLM call for trivial messages
+    MEMORY_GATE_ENABLED: bool = True
+    MEMORY_GATE_THRESHOLD: float = 0.0  # Fact-vs-trivial similarity margin to analyze
+    MEMORY_GATE_MIN_CHARS: int = 12  # Shorter messages without fact cues are skipped
+    MEMORY_GATE_AUDIT_RATE: float = 0.02  # Skipped messages analyzed to audit the gate
+
+    # Write-behind queue batching memory upserts
+    MEMORY_WRITE_BEHIND: bool = True  # Queue memory writes instead of upserting inline
+    MEMORY_WRITE_BATCH_SIZE: int = 64  # Points per bulk upsert
+    MEMORY_WRITE_FLUSH_SECONDS: float = 2.0  # Maximum time a write waits in the queue
+    MEMORY_WRITE_MAX_RETRIES: int = 3  # Retries of a failed batch before requeueing it
+
+    # Per-thread cache of retrieved memories, invalidated by memory writes
+    RETRIEVAL_CACHE_SIMILARITY: float = 0.95  # Query similarity needed to reuse results
+    RETRIEVAL_CACHE_MAX_THREADS: int = 10_000  # Threads kept in the cache
+    RETRIEVAL_CACHE_ENTRIES_PER_THREAD: int = 8  # Cached queries per thread
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 300.0  # Bounds staleness from other writers
+
+    # Inference runtime of the embedding model ("onnx"/"openvino" need sentence-transformers[onnx]/[openvino])
+    EMBEDDING_BACKEND: Literal["torch", "onnx", "openvino"] = "torch"
+    # Model file to load, e.g. "onnx/model_qint8_avx512_vnni.onnx" for int8 weights
+    EMBEDDING_MODEL_FILE: str | None = None
+
+    # Optional audio pre-processing before transcription (needs pydub and ffmpeg)
+    STT_PREPROCESS: bool = False  # Downmix, resample and trim silence before uploading
+    STT_SAMPLE_RATE: int = 16_000  # Sample rate Whisper works at
+    STT_SILENCE_THRESHOLD_DBFS: float = -40.0  # Loudness below which audio is silence
+
+    # Chunked, concurrent transcription of long voice notes (needs pydub and ffmpeg)
+    STT_CHUNKING_MIN_SECONDS: float = 60.0  # Shorter audio is sent as a single request
+    STT_CHUNK_SECONDS: float = 30.0  # Target length of a chunk
+    STT_CHUNK_OVERLAP_SECONDS: float = 1.0  # Audio shared by consecutive chunks
+    STT_CHUNK_MIN_SILENCE_MS: int = 300  # Shortest pause a chunk can be cut in
+    STT_MAX_CONCURRENCY: int = 4  # Chunks transcribed at the same time per voice note
+
+    # Cache of transcripts keyed by the audio content hash
+    STT_CACHE_DB_PATH: str | None = "/app/data/transcriptions.db"  # None: memory only
+    STT_CACHE_TTL_SECONDS: float = 7 * 24 * 3600  # Lifetime of a cached transcript
+    STT_CACHE_MAX_ENTRIES: int = 50_000  # Transcripts kept in SQLite
+    STT_CACHE_MEMORY_ENTRIES: int = 1_000  # Transcripts kept in memory
+
+    # Segmented, streamed speech synthesis of long replies
+    TTS_SEGMENT_MAX_CHARS: int = 600  # Sentences are packed into segments this long
+    TTS_MAX_CONCURRENCY: int = 3  # Segments synthesized at the same time per reply
+
+    # End-to-end time budget for a single turn and thresholds for cheaper paths
+    REQUEST_DEADLINE_SECONDS: float = 30.0  # Total budget set at ingress
+    DEADLINE_IMAGE_MIN_BUDGET: float = 15.0  # Budget needed to generate an image
+    DEADLINE_AUDIO_MIN_BUDGET: float = 8.0  # Budget needed to synthesize audio
+    DEADLINE_LOW_BUDGET: float = 5.0  # Below this, use the small model and skip extras
+
     # Storage path for short-term memory database
     SHORT_TERM_MEMORY_DB_PATH: str = "/app/data/memory.db"
 
 
 # Create a singleton settings instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()